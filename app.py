@@ -1,29 +1,67 @@
 import sys
 import asyncio
-import edge_tts
 import os
-import time
-from playsound import playsound
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import speech_recognition as sr
-import webbrowser
-import datetime
-import wikipedia
-import requests
 import genai_request as ai
+from http_client import HttpClient
+from data_cache import DataCache
+from prefetch import PrefetchScheduler, schedule_common_lookups
+import tts
+from mic import MicrophoneStream, heard_wake_phrase, strip_wake_phrase
+from recognizers import RecognizerRace
+from audio_cache import AudioCache
+from transcript import TranscriptView
+from orb import OrbAnimator
+from warmup import warm_up
+import tracing
+from engine import CommandEngine, FrontEnd
 from dotenv import load_dotenv
 import random
-import pyautogui
-import pywhatkit as pwk
 
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QTextEdit, QPushButton, QLabel, QHBoxLayout
-from PyQt5.QtGui import QFont, QPalette, QColor, QMovie
-from PyQt5.QtCore import Qt, QObject, QThread, pyqtSignal, QSize, QPoint, pyqtSlot
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QHBoxLayout
+from PyQt5.QtGui import QFont, QPalette, QColor
+from PyQt5.QtCore import Qt, QObject, QThread, pyqtSignal, QSize, QPoint, pyqtSlot, QEvent, QTimer
 
 # --- Load Environment Variables ---
 load_dotenv()
 
+# Queued in place of a text command to capture one utterance from the microphone.
+LISTEN = object()
+
+
+class CommandQueue(asyncio.Queue):
+    """
+    The worker's queue of commands. A trigger in coalesce (such as LISTEN)
+    that is already waiting is not queued again, so a burst of clicks makes
+    one turn.
+    """
+
+    def __init__(self, coalesce=()):
+        super().__init__()
+        self.coalesce = coalesce
+        self.coalesced = 0
+        self.waiting = set()  # the triggers in coalesce that are queued now
+
+    def put_nowait(self, item):
+        """Queues item. Returns False if it was dropped as a duplicate of a waiting trigger."""
+        if item in self.coalesce:
+            if item in self.waiting:
+                self.coalesced += 1
+                return False
+            self.waiting.add(item)
+        super().put_nowait(item)
+        return True
+
+    def get_nowait(self):
+        item = super().get_nowait()
+        self.waiting.discard(item)
+        return item
+
+
 # --- Assistant Backend Logic (Advanced) ---
-class AssistantWorker(QObject):
+class AssistantWorker(QObject, FrontEnd):
     status_changed = pyqtSignal(str)
     orb_state_changed = pyqtSignal(str)
     new_message = pyqtSignal(str, str)
@@ -32,35 +70,116 @@ class AssistantWorker(QObject):
     def __init__(self):
         super().__init__()
         self.is_running = True
-        self.chat_session = ai.initialize_chat()
+        # The Gemini session is created on the worker loop (see start_chat) so
+        # it never holds up the window; chat requests wait for it in a list.
+        self.chat_ready = False
+        self.waiting_for_chat = []
+        # One event loop lives for the whole life of the worker thread, so
+        # resources created on it are reused by every command.
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="dex")
+        self.loop.set_default_executor(self.executor)
+        self.commands = None
+        # The command being handled, as a task so a barge-in can cancel it.
+        self.turn = None
+        self.listening = False
+        self.barge_ins = 0
+        self.recognizer = sr.Recognizer()
+        # Local and remote engines race; see DEX_STT_BACKENDS.
+        self.stt = RecognizerRace()
+        self.mic = MicrophoneStream(pause_threshold=0.7, use_vad=True)
+        # Hands-free mode listens all the time; with a wake phrase set, only
+        # utterances that contain it are treated as commands.
+        self.wake_phrase = os.environ.get("DEX_WAKE_PHRASE", "").strip().lower() or None
+        self.hands_free_task = None
+        self.http = HttpClient()
+        self.data_cache = DataCache()
+        self.home_city = os.environ.get("DEX_HOME_CITY")
+        self.prefetcher = PrefetchScheduler(self.data_cache)
+        schedule_common_lookups(self.prefetcher, self.http, self.home_city)
         self.VOICES = ["en-US-AnaNeural", "en-GB-SoniaNeural", "en-US-ChristopherNeural"]
         self.current_voice_index = 0
-        self.AUDIO_FILE = "response.mp3"
+        self.stream_speech = True
+        self.audio_cache = AudioCache()
+        self.engine = CommandEngine(self, self.http, self.data_cache, self.home_city)
 
     async def speak(self, text):
         self.new_message.emit("Dex", text)
+        voice = self.VOICES[self.current_voice_index]
+        try:
+            if self.stream_speech:
+                await tts.speak_streaming(text, voice, cache=self.audio_cache)
+            else:
+                await tts.speak_buffered(text, voice, cache=self.audio_cache)
+        except Exception as e:
+            print(f"🔴 Speech Error: {e}")
+
+    async def speak_stream(self, sentences):
+        voice = self.VOICES[self.current_voice_index]
         try:
-            communicate = edge_tts.Communicate(text, self.VOICES[self.current_voice_index])
-            await communicate.save(self.AUDIO_FILE)
-            playsound(self.AUDIO_FILE)
+            await tts.speak_pipelined(sentences, voice, on_sentence=lambda sentence: self.new_message.emit("Dex", sentence))
         except Exception as e:
             print(f"🔴 Speech Error: {e}")
+
+    def next_voice(self):
+        self.current_voice_index = (self.current_voice_index + 1) % len(self.VOICES)
+        return self.VOICES[self.current_voice_index]
+
+    async def listen_async(self):
+        """
+        Captures and recognizes one utterance. Every capture, including a
+        command's follow-up question, comes through here, so a click while
+        one is running does not start another. If the caller is cancelled by
+        a barge-in, the capture stops too rather than taking the next
+        utterance for a turn that no longer exists.
+        """
+        cancelled = threading.Event()
+        self.listening = True
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, self.listen, cancelled)
         finally:
-            if os.path.exists(self.AUDIO_FILE):
-                os.remove(self.AUDIO_FILE)
-
-    def listen(self):
-        r = sr.Recognizer()
-        with sr.Microphone() as source:
-            self.status_changed.emit("Listening...")
-            self.orb_state_changed.emit("listening")
-            r.pause_threshold = 0.7
-            r.adjust_for_ambient_noise(source, duration=1)
-            audio = r.listen(source)
+            cancelled.set()
+            self.mic.interrupt()
+            self.listening = False
+
+    async def speak_many(self, texts):
+        """Speaks several utterances back to back, synthesizing ahead while earlier ones play."""
+        voice = self.VOICES[self.current_voice_index]
         try:
+            await tts.speak_batch(texts, voice, on_sentence=lambda text: self.new_message.emit("Dex", text), cache=self.audio_cache)
+        except Exception as e:
+            print(f"🔴 Speech Error: {e}")
+
+    def listen(self, cancelled=None):
+        # The microphone stays open and calibrated between commands; only
+        # speech that starts after this point is used.
+        self.mic.start()
+        self.mic.drain()
+        self.status_changed.emit("Listening...")
+        self.orb_state_changed.emit("listening")
+        with tracing.span("listen"):
+            audio = self.mic.next_utterance(cancelled=cancelled)
+        if cancelled is not None and cancelled.is_set():
+            return ""
+        return self.recognize(audio)
+
+    def recognize(self, audio, require_wake_phrase=False):
+        wake_phrase = self.wake_phrase if require_wake_phrase else None
+        try:
+            if audio is None:
+                raise sr.WaitTimeoutError("Microphone closed")
+            # Check the wake phrase locally before spending a network round trip.
+            if wake_phrase and heard_wake_phrase(self.recognizer, audio, wake_phrase) is False:
+                return ""
             self.status_changed.emit("Recognizing...")
             self.orb_state_changed.emit("thinking")
-            content = r.recognize_google(audio, language='en-in')
+            with tracing.span("recognize"):
+                content = self.stt.recognize(audio).text
+            if wake_phrase:
+                content = strip_wake_phrase(content, wake_phrase)
+                if not content:
+                    self.orb_state_changed.emit("idle")
+                    return ""
             self.new_message.emit("You", content)
             return content.lower()
         except Exception:
@@ -68,126 +187,179 @@ class AssistantWorker(QObject):
             self.status_changed.emit("I didn't catch that. Could you please repeat?")
             return ""
 
+    # --- Hands-free Listening ---
+    async def hands_free_loop(self):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self.mic.start)
+        except Exception as e:
+            print(f"🔴 Microphone Error: {e}")
+            self.status_changed.emit("I can't open the microphone.")
+            return
+        while not self.mic.closed:
+            self.status_changed.emit("Hands-free: listening...")
+            # Only segments the voice activity detector marked as speech arrive here.
+            audio = await loop.run_in_executor(None, self.mic.next_utterance, 0.5)
+            if audio is None:
+                continue
+            tracing.tracer.start_turn()
+            request = await loop.run_in_executor(None, self.recognize, audio, True)
+            if request:
+                self.commands.put_nowait(request)
+                await self.commands.join()
+                # Whatever was captured meanwhile is mostly our own voice.
+                self.mic.drain()
+
+    def set_hands_free(self, enabled):
+        """Turns always-on listening on or off. Safe from any thread."""
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._set_hands_free, enabled)
+
+    def _set_hands_free(self, enabled):
+        if enabled and self.hands_free_task is None:
+            self.hands_free_task = asyncio.ensure_future(self.hands_free_loop())
+        elif not enabled and self.hands_free_task is not None:
+            self.hands_free_task.cancel()
+            self.hands_free_task = None
+            self.status_changed.emit("Click the button to start")
+
     async def process_command(self, request):
         if not request:
             self.orb_state_changed.emit("idle")
             return
 
-        # --- Advanced Commands ---
-        if "hello" in request:
-            await self.speak("Hello! How can I help you?")
-        elif "time" in request:
-            now_time = datetime.datetime.now().strftime("%I:%M %p")
-            await self.speak(f"The current time is {now_time}.")
-        elif "date" in request:
-            today_date = datetime.datetime.now().strftime("%B %d, %Y")
-            await self.speak(f"Today's date is {today_date}.")
-        elif "wikipedia" in request:
-            query = request.replace("wikipedia", "").strip()
-            await self.speak(f"Searching Wikipedia for '{query}'.")
-            try:
-                result = wikipedia.summary(query, sentences=2)
-                await self.speak(f"According to Wikipedia, {result}")
-            except Exception:
-                await self.speak(f"Sorry, I couldn't find any information on '{query}'.")
-        # --- UPDATED: Advanced Music Control ---
-        elif "play" in request:
-            song = request.replace("play", "").strip()
-            if song:
-                await self.speak(f"Now playing {song} on YouTube.")
-                pwk.playonyt(song)
-            else:
-                await self.speak("What song would you like me to play?")
-        elif "change your voice" in request:
-            self.current_voice_index = (self.current_voice_index + 1) % len(self.VOICES)
-            await self.speak("I've updated my voice. How do I sound?")
-        elif "open youtube" in request:
-            await self.speak("Opening YouTube.")
-            webbrowser.open("https://www.youtube.com")
-        elif "search google for" in request:
-            query = request.replace("search google for", "").strip()
-            await self.speak(f"Searching Google for {query}.")
-            webbrowser.open(f"https://www.google.com/search?q={query}")
-        elif "weather" in request:
-            city = request.split("in ")[-1].strip() if "in " in request else "your current location"
-            await self.get_weather(city)
-        elif "news" in request:
-            await self.get_news()
-        elif "take a screenshot" in request:
-            await self.speak("Taking a screenshot.")
-            screenshot = pyautogui.screenshot()
-            screenshot.save(f"screenshot_{time.time()}.png")
-            await self.speak("Done. The screenshot has been saved in the script's directory.")
-        elif "shutdown the system" in request:
-            await self.speak("Are you sure you want to shut down?")
-            confirmation = self.listen()
-            if "yes" in confirmation:
-                await self.speak("Shutting down. Goodbye!")
-                os.system("shutdown /s /t 1")
-            else:
-                await self.speak("Shutdown cancelled.")
-        elif "restart the system" in request:
-            await self.speak("Are you sure you want to restart?")
-            confirmation = self.listen()
-            if "yes" in confirmation:
-                await self.speak("Restarting now.")
-                os.system("shutdown /r /t 1")
-            else:
-                await self.speak("Restart cancelled.")
-        elif "goodbye" in request or "exit" in request:
-            await self.speak("Goodbye!")
+        if self.engine.needs_chat(request) and not self.chat_ready:
+            # Answered once the session is up; other commands keep running meanwhile.
+            self.waiting_for_chat.append(request)
+            self.status_changed.emit("Still connecting to the AI, I'll answer in a moment.")
+            self.orb_state_changed.emit("idle")
+            return
+        if await self.engine.process(request) is False:
             self.is_running = False
             self.finished.emit()
-        else:
-            await self.speak("One moment while I process that.")
-            response = ai.send_chat_message(self.chat_session, request)
-            await self.speak(response)
         self.orb_state_changed.emit("idle")
+        turn = tracing.tracer.end_turn()
+        if turn and tracing.SHOW_IN_STATUS:
+            self.status_changed.emit(tracing.format_breakdown(*turn))
 
-    async def get_weather(self, city):
-        api_key = os.environ.get("OPENWEATHER_API_KEY")
-        if not api_key:
-            await self.speak("Weather service is not configured. Please add an API key.")
-            return
-        base_url = "http://api.openweathermap.org/data/2.5/weather?"
-        complete_url = f"{base_url}appid={api_key}&q={city}&units=metric"
+    # --- Worker Event Loop ---
+    @pyqtSlot()
+    def run(self):
+        """Runs the worker's event loop on its thread until stop() is called."""
+        asyncio.set_event_loop(self.loop)
+        self.commands = CommandQueue(coalesce=(LISTEN,))
         try:
-            response = requests.get(complete_url)
-            data = response.json()
-            if data["cod"] != "404":
-                main = data["main"]
-                weather_desc = data["weather"][0]["description"]
-                temp = main["temp"]
-                await self.speak(f"The temperature in {city} is {temp} degrees Celsius with {weather_desc}.")
-            else:
-                await self.speak("Sorry, I couldn't find the weather for that city.")
-        except Exception:
-            await self.speak("I'm having trouble fetching the weather right now.")
+            self.loop.run_until_complete(self.command_loop())
+        finally:
+            self.prefetcher.stop()
+            self.mic.close()
+            self.stt.close()
+            self.loop.run_until_complete(self.http.close())
+            self.close_loop()
+            tts.close_output()
+            self.audio_cache.flush()
+            tracing.tracer.close()
 
-    async def get_news(self):
-        api_key = os.environ.get("NEWSAPI_KEY")
-        if not api_key:
-            await self.speak("News service is not configured. Please add an API key.")
-            return
-        base_url = f"https://newsapi.org/v2/top-headlines?country=in&apiKey={api_key}"
-        try:
-            response = requests.get(base_url)
-            data = response.json()
-            articles = data.get("articles", [])
-            if articles:
-                await self.speak("Here are the top 3 news headlines:")
-                for i, article in enumerate(articles[:3]):
-                    await self.speak(article['title'])
-            else:
-                await self.speak("Sorry, I couldn't fetch the news right now.")
-        except Exception:
-            await self.speak("I'm having trouble fetching the news right now.")
+    def start_chat(self):
+        """Creates the Gemini session on an executor thread."""
+        self.status_changed.emit("Connecting to the AI...")
+        future = self.loop.run_in_executor(None, ai.initialize_chat)
+        future.add_done_callback(self.chat_started)
+
+    def chat_started(self, future):
+        if not future.cancelled() and future.exception() is None:
+            self.engine.chat_session = future.result()
+        elif not future.cancelled():
+            print(f"🔴 AI Session Error: {future.exception()}")
+        self.chat_ready = True
+        if self.engine.chat_session:
+            self.status_changed.emit("AI ready. Click the button to speak.")
+        else:
+            self.status_changed.emit("AI unavailable. Other commands still work.")
+        # Chat requests that came in meanwhile go back on the queue, in order.
+        for request in self.waiting_for_chat:
+            self.commands.put_nowait(request)
+        self.waiting_for_chat.clear()
+
+    async def command_loop(self):
+        self.start_chat()
+        self.prefetcher.start()
+        tracing.tracer.serve_metrics()
+        self.loop.run_in_executor(None, warm_up)
+        while self.is_running:
+            request = await self.commands.get()
+            if request is None:
+                break
+            try:
+                if request is LISTEN:
+                    tracing.tracer.start_turn()
+                    request = await self.listen_async()
+                self.turn = asyncio.ensure_future(self.process_command(request))
+                await asyncio.wait([self.turn])
+                if self.turn.cancelled():
+                    # Cut off by a barge-in; the capture that interrupted it is queued.
+                    self.orb_state_changed.emit("idle")
+                else:
+                    self.turn.result()
+            except Exception as e:
+                print(f"🔴 Command Error: {e}")
+                self.orb_state_changed.emit("idle")
+            finally:
+                self.turn = None
+                self.commands.task_done()
+
+    def close_loop(self):
+        pending = asyncio.all_tasks(self.loop)
+        for task in pending:
+            task.cancel()
+        self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        self.loop.close()
+        self.executor.shutdown(wait=False)
+
+    def submit(self, request=LISTEN):
+        """
+        Queues a text command, or a microphone capture by default. A capture
+        asked for while a reply is running interrupts it. Safe from any thread.
+        """
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._submit, request)
+
+    def _submit(self, request):
+        if request is LISTEN:
+            if self.listening:
+                return  # already capturing
+            self.barge_in()
+        self.commands.put_nowait(request)
+
+    def barge_in(self):
+        """
+        Cancels the command in progress. Its Gemini stream is abandoned,
+        pending speech synthesis is cancelled and the player is stopped.
+        """
+        if self.turn is not None and not self.turn.done():
+            self.barge_ins += 1
+            self.turn.cancel()
 
     @pyqtSlot()
     def run_single_command(self):
         if self.is_running:
-            request = self.listen()
-            asyncio.run(self.process_command(request))
+            self.submit(LISTEN)
+
+    def stop(self):
+        """
+        Ends the event loop. The command in progress is cancelled and the
+        microphone closed, so a capture waiting for speech returns at once.
+        Safe from any thread.
+        """
+        self.is_running = False
+        self.mic.close()
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._stop)
+
+    def _stop(self):
+        self.barge_in()
+        self.commands.put_nowait(None)
 
 
 # --- Main UI Window ---
@@ -197,8 +369,9 @@ class DexUI(QWidget):
     def __init__(self):
         super().__init__()
         self.old_pos = self.pos()
+        self.worker = None
+        self.assistant_started = False
         self.initUI()
-        self.setup_assistant_thread()
 
     def initUI(self):
         self.setWindowFlags(Qt.FramelessWindowHint)
@@ -250,21 +423,18 @@ class DexUI(QWidget):
         self.orb_label = QLabel()
         self.orb_label.setAlignment(Qt.AlignCenter)
         
-        self.movie_idle = QMovie("idle.gif")
-        self.movie_listening = QMovie("listening.gif")
-        self.movie_thinking = QMovie("thinking.gif")
-        
-        self.orb_label.setMovie(self.movie_idle)
-        self.movie_idle.start()
         self.orb_label.setFixedSize(200, 200)
-        for movie in [self.movie_idle, self.movie_listening, self.movie_thinking]:
-            movie.setScaledSize(QSize(200,200))
+        # Frames are decoded and scaled once; only the current state animates.
+        self.orb = OrbAnimator(self.orb_label, {
+            "idle": "idle.gif",
+            "listening": "listening.gif",
+            "thinking": "thinking.gif",
+        }, QSize(200, 200))
 
-        self.chat_display = QTextEdit()
-        self.chat_display.setReadOnly(True)
+        self.chat_display = TranscriptView()
         self.chat_display.setFont(QFont('Inter', 10))
         self.chat_display.setStyleSheet("""
-            QTextEdit {
+            QListView {
                 background-color: #111827;
                 border: 1px solid #00FFFF;
                 border-radius: 12px;
@@ -284,15 +454,40 @@ class DexUI(QWidget):
             QPushButton:hover { background-color: #ff2a6d ; }
         """)
         self.action_button.clicked.connect(self.trigger_listen)
+
+        self.hands_free_button = QPushButton('Hands-free')
+        self.hands_free_button.setFont(QFont('Inter', 10))
+        self.hands_free_button.setCheckable(True)
+        self.hands_free_button.setCursor(Qt.PointingHandCursor)
+        self.hands_free_button.setStyleSheet("""
+            QPushButton {
+                background-color: transparent; color: #6B7280; border: 1px solid #374151;
+                border-radius: 10px; padding: 6px;
+            }
+            QPushButton:checked { color: black; background-color: #00FFFF; border: none; }
+        """)
+        self.hands_free_button.toggled.connect(self.toggle_hands_free)
         
         self.main_layout.addWidget(title_bar)
         self.main_layout.addWidget(self.status_label)
         self.main_layout.addWidget(self.orb_label, alignment=Qt.AlignCenter)
         self.main_layout.addWidget(self.chat_display)
         self.main_layout.addWidget(self.action_button)
+        self.main_layout.addWidget(self.hands_free_button)
         
         self.set_orb_state("idle")
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.assistant_started:
+            # Bring the assistant up only once the window is on screen.
+            self.assistant_started = True
+            QTimer.singleShot(0, self.start_assistant)
+
+    def start_assistant(self):
+        self.setup_assistant_thread()
+        self.orb.preload()
+
     def setup_assistant_thread(self):
         self.thread = QThread()
         self.worker = AssistantWorker()
@@ -303,39 +498,46 @@ class DexUI(QWidget):
         self.worker.new_message.connect(self.add_message)
         self.worker.finished.connect(self.close)
         
-        self.start_listening_signal.connect(self.worker.run_single_command)
+        # The worker thread is busy running its event loop, so the button
+        # calls into the worker directly; submit() is thread-safe.
+        self.start_listening_signal.connect(self.worker.run_single_command, Qt.DirectConnection)
+        self.thread.started.connect(self.worker.run)
         
         self.thread.start()
         self.add_message("Dex", "Hello! I'm ready. Click the button to speak.")
         self.set_orb_state("idle")
+        if os.environ.get("DEX_HANDS_FREE") == "1":
+            self.hands_free_button.setChecked(True)
 
     def trigger_listen(self):
         self.start_listening_signal.emit()
 
+    def toggle_hands_free(self, checked):
+        if self.worker is not None:
+            self.worker.set_hands_free(checked)
+
     def add_message(self, sender, message):
-        align = "right" if sender.lower() == 'you' else "left"
-        bg_color = "#374151" if sender.lower() == 'you' else "#00BFFF"
-        text_color = "white" if sender.lower() == 'you' else "black"
-        
-        formatted_message = f"""
-        <div style='text-align: {align}; margin-bottom: 12px;'>
-            <span style='background-color: {bg_color}; color: {text_color}; padding: 10px 15px; border-radius: 18px; display: inline-block; max-width: 75%; font-weight: 500;'>
-                {message}
-            </span>
-        </div>
-        """
-        self.chat_display.append(formatted_message)
+        # Batched and rendered as a bubble by the transcript view.
+        self.chat_display.add_message(sender, message)
 
     def set_orb_state(self, state):
-        if state == 'listening':
-            self.orb_label.setMovie(self.movie_listening)
-            self.movie_listening.start()
-        elif state == 'thinking':
-            self.orb_label.setMovie(self.movie_thinking)
-            self.movie_thinking.start()
-        else: # idle
-            self.orb_label.setMovie(self.movie_idle)
-            self.movie_idle.start()
+        if state not in ('listening', 'thinking'):
+            state = 'idle'
+        self.orb.set_state(state)
+
+    def changeEvent(self, event):
+        # No animation while minimized.
+        if event.type() == QEvent.WindowStateChange:
+            self.orb.set_visible(self.isVisible() and not self.isMinimized())
+        super().changeEvent(event)
+
+    def showEvent(self, event):
+        self.orb.set_visible(not self.isMinimized())
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.orb.set_visible(False)
+        super().hideEvent(event)
 
     def mousePressEvent(self, event):
         self.old_pos = event.globalPos()
@@ -346,10 +548,12 @@ class DexUI(QWidget):
         self.old_pos = event.globalPos()
 
     def closeEvent(self, event):
-        if self.thread.isRunning():
-            self.worker.is_running = False
+        if self.worker is not None and self.thread.isRunning():
+            self.worker.stop()
             self.thread.quit()
-            self.thread.wait()
+            # A capture or a call that ignores cancellation must not keep the window from closing.
+            self.thread.wait(2000)
+        self.chat_display.transcript.close()
         event.accept()
 
 if __name__ == '__main__':
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".dex", "tts_cache")
+DEFAULT_MAX_MB = 50
+# Only short phrases are worth keeping; long AI replies are rarely repeated.
+CACHE_MAX_CHARS = 200
+# Cache hits only change the eviction order, so they are written back at most this often.
+INDEX_SAVE_SECONDS = 60
+
+
+class AudioCache:
+    """
+    Persistent cache of synthesized speech, keyed by (voice, text).
+    Files live in one directory and the least recently used ones are
+    evicted once the total size goes over max_bytes.
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or os.environ.get("DEX_TTS_CACHE_DIR", DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("DEX_TTS_CACHE_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.index_file = os.path.join(self.directory, "index.json")
+        self.entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self.saved_at = time.monotonic()
+        self.dirty = False  # hits since the index was last written
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def key(voice, text):
+        # The voice is part of the key, so a voice change can never return old audio.
+        return hashlib.sha256(f"{voice}\n{text.strip()}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def cacheable(text):
+        return 0 < len(text.strip()) <= CACHE_MAX_CHARS
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, "r") as f:
+                saved = json.load(f)
+        except (FileNotFoundError, ValueError):
+            saved = []
+        for key, size in saved:
+            if os.path.exists(self._path(key)):
+                self.entries[key] = size
+
+    def _save_index(self):
+        tmp_file = self.index_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(list(self.entries.items()), f)
+        os.replace(tmp_file, self.index_file)
+        self.saved_at = time.monotonic()
+        self.dirty = False
+
+    def total_bytes(self):
+        return sum(self.entries.values())
+
+    def get(self, voice, text):
+        """Returns the cached MP3 bytes for (voice, text), or None on a miss."""
+        key = self.key(voice, text)
+        if key in self.entries:
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                del self.entries[key]
+            else:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                self.dirty = True
+                if time.monotonic() - self.saved_at > INDEX_SAVE_SECONDS:
+                    self._save_index()
+                return data
+        self.misses += 1
+        return None
+
+    def put(self, voice, text, data):
+        """Stores MP3 bytes for (voice, text) and evicts old entries over budget."""
+        if not data or len(data) > self.max_bytes:
+            return
+        key = self.key(voice, text)
+        tmp_file = self._path(key) + ".tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(data)
+        os.replace(tmp_file, self._path(key))
+        self.entries[key] = len(data)
+        self.entries.move_to_end(key)
+        self._evict()
+        self._save_index()
+
+    def flush(self):
+        """Writes the eviction order back if hits changed it since the last save. Call on shutdown."""
+        if self.dirty:
+            self._save_index()
+
+    def _evict(self):
+        total = self.total_bytes()
+        while total > self.max_bytes and self.entries:
+            key, size = self.entries.popitem(last=False)
+            total -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes,
+        }
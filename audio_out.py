@@ -0,0 +1,295 @@
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+# --- In-Memory Playback ---
+# Speech is decoded to 16-bit PCM in memory and played by one long-lived
+# output thread, so nothing touches the disk and utterances can never race on
+# a shared file. Buffers are passed as memoryviews over the decoder's own
+# array from decoder to device; only the few bytes of a device period that
+# straddle two utterances are copied, which is what makes them gapless.
+SAMPLE_RATE = 24000  # Edge TTS voices are 24 kHz mono
+CHANNELS = 1
+SAMPLE_WIDTH = 2
+QUEUE_BUFFERS = int(os.environ.get("DEX_AUDIO_QUEUE", "8"))  # decoded utterances waiting to play
+DEVICE_BUFFER_MS = 60  # also the longest a barge-in can take to go quiet
+AHEAD_SECONDS = 0.5  # audio the device sink holds beyond what is playing
+STREAM_BLOCK_FRAMES = SAMPLE_RATE // 10  # StreamDecoder hands over 100 ms at a time
+
+
+def decode(mp3_data, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+    """Decodes MP3 bytes to signed 16-bit PCM. Returns a byte memoryview over the decoded samples (no copy)."""
+    import miniaudio  # optional; see make_sink()
+    decoded = miniaudio.decode(mp3_data, output_format=miniaudio.SampleFormat.SIGNED16, nchannels=channels,
+                               sample_rate=sample_rate)
+    return memoryview(decoded.samples).cast("B")
+
+
+def pcm_duration(pcm, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+    return len(pcm) / (sample_rate * channels * SAMPLE_WIDTH)
+
+
+class StreamDecoder:
+    """
+    Decodes MP3 that is still arriving, on a thread of its own. feed()
+    takes chunks as they come in; each block of PCM is passed to on_pcm as
+    a byte memoryview as soon as it is decoded. on_pcm runs on the decoder
+    thread and may block, which holds back decoding.
+    """
+
+    def __init__(self, on_pcm, block_frames=STREAM_BLOCK_FRAMES, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+        self.on_pcm = on_pcm
+        self.block_frames = block_frames
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.chunks = queue.Queue()
+        self.buffer = b""
+        self.ended = False
+        self.cancelled = False
+        self.error = None
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="dex-decode", daemon=True)
+        self.thread.start()
+
+    def feed(self, data):
+        self.chunks.put(data)
+
+    def finish(self):
+        """Marks the end of the MP3 stream; the decoder thread ends once it has all been decoded."""
+        self.chunks.put(None)
+
+    def cancel(self):
+        """Ends decoding without waiting for the rest of the stream."""
+        self.cancelled = True
+        self.chunks.put(None)
+
+    def read(self, size):
+        # Called by miniaudio for more input. It returns whatever has arrived
+        # rather than waiting for size bytes, so decoding keeps pace with it.
+        if not self.buffer and not self.ended:
+            data = self.chunks.get()
+            if data is None:
+                self.ended = True
+            else:
+                self.buffer = data
+        if self.cancelled:
+            return b""
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def run(self):
+        import miniaudio
+        decoder = self
+
+        class Source(miniaudio.StreamableSource):
+            def read(self, num_bytes):
+                return decoder.read(num_bytes)
+
+        try:
+            for block in miniaudio.stream_any(Source(), miniaudio.FileFormat.MP3, miniaudio.SampleFormat.SIGNED16,
+                                              self.channels, self.sample_rate, self.block_frames):
+                if self.cancelled:
+                    break
+                self.on_pcm(memoryview(block).cast("B"))
+        except Exception as e:
+            if not self.cancelled:
+                self.error = e
+        finally:
+            self.done.set()
+
+
+# --- Sinks ---
+# A sink plays PCM. write(pcm, on_done, epoch) may block the output thread
+# until there is room; on_done(played) is called once the buffer has gone to
+# the device, or with False if it was dropped. abort() silences the sink at
+# once and bumps its epoch, so a write begun for an older epoch is dropped.
+class DeviceSink:
+    """Plays through the default output device with miniaudio, pulling from a short queue of memoryviews."""
+
+    def __init__(self, sample_rate=SAMPLE_RATE, channels=CHANNELS, buffer_ms=DEVICE_BUFFER_MS, ahead=AHEAD_SECONDS):
+        import miniaudio
+        self.frame_bytes = channels * SAMPLE_WIDTH
+        self.max_ahead = int(ahead * sample_rate) * self.frame_bytes
+        self.cond = threading.Condition()
+        self.pending = deque()  # [memoryview, on_done]
+        self.pending_bytes = 0
+        self.epoch = 0  # bumped by abort()
+        self.device = miniaudio.PlaybackDevice(output_format=miniaudio.SampleFormat.SIGNED16, nchannels=channels,
+                                               sample_rate=sample_rate, buffersize_msec=buffer_ms, app_name="Dex")
+        stream = self.stream()
+        next(stream)
+        self.device.start(stream)
+
+    def stream(self):
+        """The device callback, run on miniaudio's audio thread: each send asks for that many frames."""
+        frames = yield b""
+        while True:
+            frames = yield self.take(frames * self.frame_bytes)
+
+    def take(self, wanted):
+        parts, size, finished = [], 0, []
+        with self.cond:
+            while self.pending and size < wanted:
+                entry = self.pending[0]
+                view = entry[0]
+                count = min(len(view), wanted - size)
+                parts.append(view[:count])
+                size += count
+                if count == len(view):
+                    self.pending.popleft()
+                    finished.append(entry[1])
+                else:
+                    entry[0] = view[count:]
+            self.pending_bytes -= size
+            self.cond.notify_all()
+        for on_done in finished:
+            on_done(True)
+        if len(parts) == 1:
+            return parts[0]
+        # Only a period that spans two utterances is stitched; an empty one is silence.
+        return b"".join(parts)
+
+    def write(self, pcm, on_done, epoch):
+        with self.cond:
+            while self.pending_bytes > self.max_ahead and self.epoch == epoch:
+                self.cond.wait()
+            if self.epoch != epoch:
+                on_done(False)
+                return
+            self.pending.append([pcm, on_done])
+            self.pending_bytes += len(pcm)
+
+    def abort(self):
+        with self.cond:
+            dropped = [entry[1] for entry in self.pending]
+            self.pending.clear()
+            self.pending_bytes = 0
+            self.epoch += 1
+            self.cond.notify_all()
+        for on_done in dropped:
+            on_done(False)
+
+    def close(self):
+        self.abort()
+        self.device.close()
+
+
+class NullSink:
+    """
+    Plays nothing. Each buffer takes its duration divided by speed, or no
+    time at all with speed=None, so tests and benchmarks keep real pacing
+    without a sound device.
+    """
+
+    def __init__(self, speed=1.0):
+        self.speed = speed
+        self.cond = threading.Condition()
+        self.epoch = 0
+        self.played = 0  # bytes
+
+    def write(self, pcm, on_done, epoch):
+        with self.cond:
+            duration = pcm_duration(pcm) / self.speed if self.speed else 0
+            if self.cond.wait_for(lambda: self.epoch != epoch, duration):
+                on_done(False)
+                return
+            self.played += len(pcm)
+        on_done(True)
+
+    def abort(self):
+        with self.cond:
+            self.epoch += 1
+            self.cond.notify_all()
+
+    def close(self):
+        self.abort()
+
+
+# --- Output Thread ---
+class AudioOutput:
+    """
+    Feeds PCM buffers to a sink on a dedicated thread. submit() queues a
+    buffer behind those already waiting (the queue is bounded, so a
+    producer far ahead of playback blocks) and consecutive buffers play
+    back to back. stop() is the barge-in: it drops the queue and silences
+    the sink.
+    """
+
+    def __init__(self, sink, max_queued=QUEUE_BUFFERS):
+        self.sink = sink
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.generation = 0  # bumped by stop(); older buffers are dropped
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, name="dex-audio", daemon=True)
+        self.thread.start()
+
+    def submit(self, pcm, on_start=None, generation=None, block=True):
+        """
+        Queues pcm to play after everything already submitted; on_start is
+        called on the output thread as it begins. Returns a Future that
+        resolves to True once played, or False if stop() dropped it. A
+        buffer submitted for a generation that stop() has since ended is
+        dropped, so a submit that was blocked on a full queue during a
+        barge-in never plays. Raises queue.Full if block is False and the
+        queue is full.
+        """
+        done = Future()
+        generation = self.generation if generation is None else generation
+        self.queue.put((generation, pcm, on_start, done), block)
+        return done
+
+    def stop(self):
+        with self.lock:
+            self.generation += 1
+            self.sink.abort()
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[3].set_result(False)
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            generation, pcm, on_start, done = item
+            with self.lock:
+                if generation != self.generation:
+                    done.set_result(False)
+                    continue
+                epoch = self.sink.epoch
+            # A failing callback or device fails this utterance, not the output thread.
+            try:
+                if on_start is not None:
+                    on_start()
+                self.sink.write(pcm, lambda played, done=done: done.done() or done.set_result(played), epoch)
+            except Exception as e:
+                if not done.done():
+                    done.set_exception(e)
+
+    def close(self):
+        self.stop()
+        self.queue.put(None)
+        self.thread.join(timeout=2)
+        self.sink.close()
+
+
+def make_sink(kind=None):
+    """
+    The sink named by DEX_AUDIO_SINK: "device" (the default) or "null".
+    Falls back to a silent sink if miniaudio or the device is unavailable.
+    """
+    kind = kind or os.environ.get("DEX_AUDIO_SINK", "device")
+    if kind == "null":
+        return NullSink()
+    try:
+        return DeviceSink()
+    except Exception as e:
+        print(f"🔴 Audio Output Error: {e}. Speech will be silent.")
+        return NullSink()
+
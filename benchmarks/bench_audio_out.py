@@ -0,0 +1,155 @@
+"""
+Checks the in-memory audio output: gapless back-to-back utterances, zero-copy hand-off, stop latency and the queue bound.
+
+Plays short generated tones through the default miniaudio device (its null
+backend is fine, so this runs headless) and through NullSink:
+    python benchmarks/bench_audio_out.py
+"""
+import argparse
+import array
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import audio_out
+from audio_out import SAMPLE_RATE, AudioOutput, DeviceSink, NullSink
+from fakes import FAKE_FRAME
+
+# Stopping must be heard within a device period or two.
+MAX_STOP_SECONDS = 0.15
+
+
+def tone(seconds, value):
+    """PCM of a constant nonzero sample, so every utterance is recognizable in the device stream."""
+    return memoryview(array.array("h", [value]) * int(seconds * SAMPLE_RATE)).cast("B")
+
+
+class RecordingSink(DeviceSink):
+    """A DeviceSink that keeps every period it hands to the device."""
+
+    def __init__(self):
+        self.periods = []
+        super().__init__()
+
+    def take(self, wanted):
+        period = super().take(wanted)
+        self.periods.append(period)
+        return period
+
+
+def check_gapless(utterances, seconds):
+    sink = RecordingSink()
+    output = AudioOutput(sink)
+    buffers = [tone(seconds, value) for value in range(1, utterances + 1)]
+    done = [output.submit(pcm) for pcm in buffers]
+    played = all(future.result(timeout=seconds * utterances + 5) for future in done)
+    time.sleep(0.1)
+    output.close()
+
+    # The device gets an empty period, which it plays as silence, whenever nothing is queued.
+    sizes = [len(p) for p in sink.periods]
+    first = next(i for i, size in enumerate(sizes) if size)
+    last = len(sizes) - next(i for i, size in enumerate(reversed(sizes)) if size)
+    continuous = all(sizes[first:last])
+    expected = b"".join(buffers)
+    shared = [p for p in sink.periods if isinstance(p, memoryview) and any(p.obj is b.obj for b in buffers)]
+    stitched = [p for p in sink.periods if isinstance(p, bytes) and p]
+    return {"played": played, "gapless": continuous and b"".join(sink.periods) == expected, "periods": len([p for p in sink.periods if len(p)]),
+            "zero_copy": len(shared), "stitched": len(stitched)}
+
+
+def check_stop(rounds):
+    latencies = []
+    for _ in range(rounds):
+        sink = RecordingSink()
+        output = AudioOutput(sink)
+        pcm = tone(5.0, 7)
+        done = output.submit(pcm)
+        time.sleep(0.3)
+        stopped = time.perf_counter()
+        output.stop()
+        # Silence is when the device is handed its first empty period.
+        heard = len(sink.periods)
+        while time.perf_counter() - stopped < 2.0:
+            if any(not len(p) for p in sink.periods[heard:]):
+                break
+            time.sleep(0.001)
+        latencies.append(time.perf_counter() - stopped)
+        if done.result(timeout=2) is not False:
+            latencies[-1] = float("inf")
+        output.close()
+    return latencies
+
+
+def check_queue_bound(max_queued):
+    """A producer far ahead of playback is held back by the bounded queue."""
+    sink = NullSink(speed=2)
+    output = AudioOutput(sink, max_queued=max_queued)
+    submitted = []
+
+    def produce():
+        for _ in range(max_queued * 3):
+            output.submit(tone(0.5, 1))
+            submitted.append(time.perf_counter())
+    producer = threading.Thread(target=produce)
+    producer.start()
+    time.sleep(0.1)
+    ahead = len(submitted)
+    producer.join()
+    output.close()
+    return ahead
+
+
+def check_decode(runs):
+    mp3 = FAKE_FRAME * 1000  # 24 seconds of speech
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        pcm = audio_out.decode(mp3)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), audio_out.pcm_duration(pcm)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--utterances", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=0.25, help="length of each utterance; not a whole number of periods")
+    parser.add_argument("--rounds", type=int, default=5, help="stops to time")
+    args = parser.parse_args()
+
+    problems = []
+    decode_time, decoded = check_decode(5)
+    print(f"decode: {decoded:.1f}s of MP3 in {decode_time * 1000:.1f}ms")
+
+    gapless = check_gapless(args.utterances, args.seconds)
+    print(f"{args.utterances} utterances back to back: {gapless['periods']} device periods, "
+          f"{gapless['zero_copy']} passed as views of the decoded buffers, {gapless['stitched']} stitched across utterances")
+    if not gapless["played"]:
+        problems.append("an utterance was not played")
+    if not gapless["gapless"]:
+        problems.append("the device stream has gaps or differs from the utterances")
+    if gapless["stitched"] > args.utterances - 1:
+        problems.append(f"{gapless['stitched']} periods were copied; only the {args.utterances - 1} joins should be")
+
+    stops = check_stop(args.rounds)
+    print(f"stop to silence: median {statistics.median(stops) * 1000:.1f}ms   max {max(stops) * 1000:.1f}ms")
+    if max(stops) > MAX_STOP_SECONDS:
+        problems.append(f"stopping took {max(stops) * 1000:.0f}ms")
+
+    ahead = check_queue_bound(4)
+    print(f"queue bound 4: the producer got {ahead} buffers ahead before blocking")
+    if ahead > 4 + 2:  # the queue, the buffer playing and the one being submitted
+        problems.append(f"the producer ran {ahead} buffers ahead of playback")
+
+    for problem in problems:
+        print(f"🔴 {problem}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Measures how quickly the worker reacts to the Speak button while it is busy: coalescing of click bursts and barge-in.
+
+Runs AssistantWorker on its own thread with the stand-ins from fakes.py for the
+microphone, recognizer, Gemini and edge_tts, and plays at --speed times real time
+through a null audio sink (or, with --output pipe, a stand-in player process), so
+no device or network is needed:
+    python benchmarks/bench_barge_in.py --rounds 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Plays nothing, but reads its stdin no faster than the audio would play.
+PLAYER_SCRIPT = """
+import sys, time
+speed = float(sys.argv[1])
+while True:
+    data = sys.stdin.buffer.read1(65536)
+    if not data:
+        break
+    time.sleep(len(data) / 6000 / speed)
+"""
+STORY = "tell me a long story about dragons"
+QUESTION = "what time is it"
+
+
+class Probe:
+    """Everything the benchmark watches, updated from the worker's threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.players = []
+        self.sink = None
+        self.listens = []
+        self.messages = []
+        self.chunks_read = 0
+
+    def wait_for(self, condition, timeout=20.0):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            with self.lock:
+                if condition():
+                    return True
+            time.sleep(0.002)
+        return False
+
+    def said(self, prefix, after=0.0):
+        return [t for t, text in self.messages if text.startswith(prefix) and t >= after]
+
+
+def make_worker(args, probe, workdir):
+    """The worker with the stand-ins from fakes.py, instrumented for the probe."""
+    from fakes import FakeCommunicate, FakeMicrophone, FakeModel, FakeRecognizer, Latency, install_fakes
+
+    import tts
+    from audio_out import NullSink
+
+    class TrackedSink(NullSink):
+        def __init__(self, speed):
+            super().__init__(speed)
+            self.cut_at = None
+
+        def write(self, pcm, on_done, epoch):
+            def done(played):
+                if not played:
+                    self.cut_at = time.perf_counter()
+                on_done(played)
+            super().write(pcm, done, epoch)
+
+    class TrackedPlayer(tts.PipePlayer):
+        def __init__(self, command):
+            super().__init__(command)
+            self.stopped_at = None
+            self.finished_at = None
+            with probe.lock:
+                probe.players.append(self)
+
+        def stop(self):
+            self.stopped_at = time.perf_counter()
+            super().stop()
+
+        async def finish(self):
+            await super().finish()
+            self.finished_at = time.perf_counter()
+
+    class CountingModel(FakeModel):
+        def generate_content(self, contents, stream=False):
+            response = super().generate_content(contents, stream)
+            return self.count(response) if stream else response
+
+        def count(self, chunks):
+            for chunk in chunks:
+                with probe.lock:
+                    probe.chunks_read += 1
+                yield chunk
+
+    probe.sink = TrackedSink(args.speed)
+    worker = install_fakes(
+        workdir, probe.sink,
+        communicate=lambda text, voice: FakeCommunicate(text, voice, Latency(0.1), Latency(0.01)),
+        microphone=FakeMicrophone(speed=args.speed), recognizer=FakeRecognizer(Latency(0.05)),
+        model=CountingModel(Latency(0.3), Latency(0.03), reply_sentences=args.sentences), output=args.output,
+        player=TrackedPlayer, player_command=[sys.executable, "-c", PLAYER_SCRIPT, str(args.speed)])
+    next_utterance = worker.mic.next_utterance
+
+    def listen(timeout=None, cancelled=None):
+        with probe.lock:
+            probe.listens.append(time.perf_counter())
+        return next_utterance(timeout, cancelled)
+    worker.mic.next_utterance = listen
+    return worker
+
+
+def idle(worker):
+    return worker.turn is None and not worker.listening and worker.commands is not None and worker.commands.empty()
+
+
+def burst(worker, probe, clicks):
+    """Clicks Speak many times at once while idle. Returns how many captures ran."""
+    worker.mic.say(QUESTION)
+    before = len(probe.listens)
+    for _ in range(clicks):
+        worker.run_single_command()
+    probe.wait_for(lambda: len(probe.said("The current time")) > 0)
+    time.sleep(0.3)
+    probe.wait_for(lambda: idle(worker))
+    return len(probe.listens) - before
+
+
+def barge_in(worker, probe):
+    """Asks for a long story, clicks Speak while it plays, and times how fast it stops."""
+    worker.mic.say(STORY)
+    asked = time.perf_counter()
+    worker.run_single_command()
+    started = probe.wait_for(lambda: probe.said("Sentence 2", after=asked))
+    if not started:
+        raise RuntimeError("the story never started playing")
+    with probe.lock:
+        playing = [p for p in probe.players if p.process is not None and p.finished_at is None]
+        chunks_at_click = probe.chunks_read
+    worker.mic.say(QUESTION)
+    clicked = time.perf_counter()
+    worker.run_single_command()
+    if playing:
+        probe.wait_for(lambda: all(p.finished_at is not None for p in playing))
+        silence = max(p.finished_at for p in playing) - clicked if all(p.finished_at for p in playing) else None
+    else:
+        cut = probe.wait_for(lambda: probe.sink.cut_at is not None and probe.sink.cut_at > clicked)
+        silence = probe.sink.cut_at - clicked if cut else None
+    probe.wait_for(lambda: probe.listens[-1] > clicked)
+    listening = probe.listens[-1] - clicked
+    answered = probe.wait_for(lambda: probe.said("The current time", after=clicked))
+    probe.wait_for(lambda: idle(worker))
+    time.sleep(0.3)  # let abandoned work wind down
+    with probe.lock:
+        late = [t for t, text in probe.messages if text.startswith("Sentence") and t > clicked + 0.05]
+        chunks_after = probe.chunks_read - chunks_at_click
+    return {"silence": silence, "listening": listening, "answered": answered, "late_sentences": len(late),
+            "chunks_after": chunks_after}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5, help="barge-ins to time")
+    parser.add_argument("--clicks", type=int, default=10, help="clicks in the burst")
+    parser.add_argument("--speed", type=float, default=4.0, help="speaking and playback speed relative to real time")
+    parser.add_argument("--sentences", type=int, default=30, help="sentences in the story")
+    parser.add_argument("--output", choices=["memory", "pipe"], default="memory",
+                        help="play through the in-memory audio output, or a player process")
+    args = parser.parse_args()
+
+    from PyQt5.QtCore import QCoreApplication, QThread, Qt
+    app = QCoreApplication(sys.argv)
+    probe = Probe()
+    worker = make_worker(args, probe, tempfile.mkdtemp(prefix="dex-barge-"))
+
+    def on_message(sender, text):
+        if sender == "Dex":
+            with probe.lock:
+                probe.messages.append((time.perf_counter(), text))
+    worker.new_message.connect(on_message, Qt.DirectConnection)
+    thread = QThread()
+    worker.moveToThread(thread)
+    thread.started.connect(worker.run)
+    thread.start()
+
+    problems = []
+    try:
+        probe.wait_for(lambda: worker.commands is not None)
+        captures = burst(worker, probe, args.clicks)
+        print(f"burst of {args.clicks} clicks while idle: {captures} capture(s), {worker.commands.coalesced} coalesced in the queue")
+        if captures != 1:
+            problems.append(f"{args.clicks} clicks made {captures} captures")
+
+        rounds = [barge_in(worker, probe) for _ in range(args.rounds)]
+        silences = [r["silence"] for r in rounds if r["silence"] is not None]
+        listens = [r["listening"] for r in rounds]
+        print(f"barge-in over {args.rounds} rounds ({args.sentences}-sentence story, {args.speed:g}x speech, {args.output} output)")
+        if silences:
+            print(f"  click to silence      median {statistics.median(silences) * 1000:7.1f}ms   max {max(silences) * 1000:7.1f}ms")
+        print(f"  click to listening    median {statistics.median(listens) * 1000:7.1f}ms   max {max(listens) * 1000:7.1f}ms")
+        print(f"  story sentences shown after the click: {sum(r['late_sentences'] for r in rounds)}")
+        print(f"  Gemini chunks read after the click: {[r['chunks_after'] for r in rounds]}")
+        if len(silences) != len(rounds):
+            problems.append("the story was still playing after the barge-in")
+        if not all(r["answered"] for r in rounds):
+            problems.append("the question after a barge-in was not answered")
+        if any(r["late_sentences"] for r in rounds):
+            problems.append("the story kept going after the barge-in")
+        total_chunks = len(" ".join(f"Sentence {i + 1} about {STORY}." for i in range(args.sentences)).split(" ")) // 4
+        if any(r["chunks_after"] >= total_chunks for r in rounds):
+            problems.append("the Gemini stream was read to the end after the barge-in")
+        alive = [p for p in probe.players if p.process is not None and p.process.returncode is None]
+        if alive:
+            problems.append(f"{len(alive)} player process(es) left running")
+        print(f"worker: {worker.barge_ins} barge-ins, {len(probe.players)} players started, {len(alive)} still running")
+    finally:
+        worker.stop()
+        thread.quit()
+        thread.wait()
+
+    for problem in problems:
+        print(f"🔴 {problem}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Shows request size and latency per turn for a bounded chat history against an unbounded one.
+
+Uses a local fake model whose latency grows with the tokens it is sent, so no API key is needed:
+    python benchmarks/bench_chat_history.py --turns 200
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_history import SUMMARY_MAX_TOKENS, ManagedChat, estimate_tokens
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel: a fixed delay plus a per-token cost for the input."""
+
+    def __init__(self, base_delay=0.002, per_token_delay=0.000002, reply_words=40):
+        self.base_delay = base_delay
+        self.per_token_delay = per_token_delay
+        self.reply_words = reply_words
+
+    def generate_content(self, contents, stream=False):
+        if isinstance(contents, str):
+            tokens = estimate_tokens(contents)
+        else:
+            tokens = sum(estimate_tokens(part) for c in contents for part in c["parts"])
+        time.sleep(self.base_delay + self.per_token_delay * tokens)
+        reply = " ".join(["word"] * self.reply_words) + "."
+        if stream:
+            return iter([FakeResponse(reply[:20]), FakeResponse(reply[20:])])
+        return FakeResponse(reply)
+
+
+def run(chat, turns, checkpoints, stream):
+    rows = []
+    for turn in range(1, turns + 1):
+        prompt = f"Question number {turn}: tell me something about topic {turn}."
+        start = time.perf_counter()
+        if stream:
+            for _ in chat.send_message(prompt, stream=True):
+                pass
+        else:
+            chat.send_message(prompt)
+        latency = time.perf_counter() - start
+        if turn in checkpoints:
+            rows.append((turn, chat.last_request_tokens, latency))
+    # Let a summary still being written finish before reading the stats.
+    while chat.compacting:
+        time.sleep(0.01)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=2000, help="history token budget for the bounded chat")
+    parser.add_argument("--stream", action="store_true", help="read replies as streams")
+    args = parser.parse_args()
+
+    checkpoints = {t for t in (1, 10, 25, 50, 100, 200, 500, 1000) if t <= args.turns} | {args.turns}
+    bounded = ManagedChat(FakeModel(), max_history_tokens=args.budget)
+    unbounded = ManagedChat(FakeModel(), max_history_tokens=None)
+    bounded_rows = run(bounded, args.turns, checkpoints, args.stream)
+    unbounded_rows = run(unbounded, args.turns, checkpoints, args.stream)
+
+    print(f"{'turn':>6}{'bounded tokens':>16}{'latency':>10}{'unbounded tokens':>18}{'latency':>10}")
+    for (turn, b_tokens, b_latency), (_, u_tokens, u_latency) in zip(bounded_rows, unbounded_rows):
+        print(f"{turn:>6}{b_tokens:>16}{b_latency * 1000:>8.1f}ms{u_tokens:>18}{u_latency * 1000:>8.1f}ms")
+    stats = bounded.stats()
+    print(f"\nbounded: max {stats['max_request_tokens']} tokens/request, avg {stats['avg_request_tokens']:.0f}, "
+          f"{stats['turns']} turns kept, {stats['summaries']} summaries written")
+
+    # History budget, plus the summary, the new prompt and the turns added while a summary was being written.
+    limit = args.budget + SUMMARY_MAX_TOKENS + 200
+    if stats["max_request_tokens"] > limit:
+        print(f"FAIL: a request sent {stats['max_request_tokens']} tokens, expected at most {limit}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""
+Measures where the time goes in a spoken turn, stage by stage and end to end.
+
+Drives AssistantWorker's real listen and process_command path with the local
+stand-ins from fakes.py for the microphone, speech recognition, Gemini,
+edge_tts, OpenWeatherMap, NewsAPI, Wikipedia and the audio device. Every
+stand-in has its own latency distribution. Speaking and playback run --speed
+times faster than real time so a run stays short; service latencies are not
+scaled. Save a run and compare a later one against it:
+    python benchmarks/bench_e2e.py --turns 40 --json baseline.json
+    python benchmarks/bench_e2e.py --turns 40 --compare baseline.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+STAGES = ["listen", "recognize", "route", "gemini", "services", "tts synth", "decode", "playback", "first audio",
+          "end to end"]
+COMMANDS = [
+    "hello",
+    "what time is it",
+    "what is the weather in london",
+    "tell me the news",
+    "wikipedia alan turing",
+    "why is the sky blue",
+    "explain how a rainbow forms in simple words",
+    "what should i cook for dinner tonight",
+]
+
+
+# --- Stage Timing ---
+class StageClock:
+    """Adds up the time spent in each stage of the current turn. Stages run on several threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.turn = None
+        self.heard_at = None
+
+    def start_turn(self):
+        with self.lock:
+            self.turn = defaultdict(float)
+            self.heard_at = None
+
+    def add(self, stage, seconds):
+        with self.lock:
+            if self.turn is not None:
+                self.turn[stage] += seconds
+
+    def heard(self):
+        """Marks the end of the user's speech."""
+        with self.lock:
+            self.heard_at = time.perf_counter()
+
+    def audio_started(self):
+        """Records the time from the end of the user's speech to the first sound."""
+        with self.lock:
+            if self.turn is not None and self.heard_at is not None and "first audio" not in self.turn:
+                self.turn["first audio"] = time.perf_counter() - self.heard_at
+
+    def timed(self, stage, function):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        return wrapper
+
+    def timed_async(self, stage, function):
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        return wrapper
+
+
+class TimedModel:
+    """Counts the time a model spends producing a reply, not the time its caller spends on the chunks."""
+
+    def __init__(self, model, clock):
+        self.model = model
+        self.clock = clock
+
+    def generate_content(self, contents, stream=False):
+        start = time.perf_counter()
+        response = self.model.generate_content(contents, stream=stream)
+        self.clock.add("gemini", time.perf_counter() - start)
+        if not stream:
+            return response
+        return self.timed_chunks(iter(response))
+
+    def timed_chunks(self, chunks):
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                self.clock.add("gemini", time.perf_counter() - start)
+            yield chunk
+
+
+class TimedCommunicate:
+    """Wraps a FakeCommunicate so the time spent waiting for synthesis is counted."""
+
+    def __init__(self, communicate, clock):
+        self.communicate = communicate
+        self.clock = clock
+
+    async def stream(self):
+        chunks = self.communicate.stream().__aiter__()
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                self.clock.add("tts synth", time.perf_counter() - start)
+            yield chunk
+
+
+class SimulatedPlayer:
+    """Stands in for tts.PipePlayer: plays what it is given at speed times real time, starting on the first write."""
+
+    def __init__(self, clock, speed):
+        self.clock = clock
+        self.speed = speed
+        self.started = None
+        self.ends_at = None
+
+    async def write(self, chunk):
+        from fakes import audio_duration
+        now = time.perf_counter()
+        if self.started is None:
+            self.started = now
+            self.clock.audio_started()
+        self.ends_at = max(self.ends_at or now, now) + audio_duration(chunk) / self.speed
+        # The pipe takes a few seconds of audio before a write blocks.
+        if self.ends_at - now > 2.0 / self.speed:
+            await asyncio.sleep(self.ends_at - now - 2.0 / self.speed)
+
+    async def finish(self):
+        if self.started is None:
+            return
+        await asyncio.sleep(max(0.0, self.ends_at - time.perf_counter()))
+        self.clock.add("playback", time.perf_counter() - self.started)
+
+
+def timed_sink(clock, speed):
+    """A NullSink at speed times real time that reports when audio starts and how long it plays."""
+    from audio_out import NullSink
+
+    class TimedSink(NullSink):
+        def write(self, pcm, on_done, epoch):
+            clock.audio_started()
+            start = time.perf_counter()
+
+            def done(played):
+                # Counted before the turn can see the buffer finish.
+                clock.add("playback", time.perf_counter() - start)
+                on_done(played)
+            super().write(pcm, done, epoch)
+    return TimedSink(speed)
+
+
+def timed_stream_decoder(clock):
+    """A StreamDecoder that counts its thread's busy time, not its waits for input or for room to play."""
+    from audio_out import StreamDecoder
+
+    class TimedStreamDecoder(StreamDecoder):
+        def __init__(self, on_pcm, *args, **kwargs):
+            self.busy_since = time.perf_counter()
+            super().__init__(self.waiting(on_pcm), *args, **kwargs)
+
+        def waiting(self, function):
+            def wrapper(*args):
+                clock.add("decode", time.perf_counter() - self.busy_since)
+                try:
+                    return function(*args)
+                finally:
+                    self.busy_since = time.perf_counter()
+            return wrapper
+
+        def read(self, size):
+            return self.waiting(super().read)(size)
+    return TimedStreamDecoder
+
+
+# --- Benchmark ---
+def make_worker(args, clock, workdir):
+    """The worker with every external service it uses pointed at a timed local stand-in."""
+    from fakes import FakeCommunicate, FakeMicrophone, FakeModel, FakeRecognizer, FakeServices, Latency, install_fakes
+
+    import audio_out
+    audio_out.decode = clock.timed("decode", audio_out.decode)
+    audio_out.StreamDecoder = timed_stream_decoder(clock)
+
+    def model(seed):
+        return TimedModel(FakeModel(Latency(args.llm_latency, args.sigma, seed=seed), Latency(args.llm_chunk_latency, seed=seed)), clock)
+    recognizer = FakeRecognizer(Latency(args.stt_latency, args.sigma, seed=4))
+    recognizer.recognize = clock.timed("recognize", recognizer.recognize)
+    worker = install_fakes(
+        workdir, timed_sink(clock, args.speed),
+        communicate=lambda text, voice: TimedCommunicate(
+            FakeCommunicate(text, voice, Latency(args.tts_latency, args.sigma, seed=1), Latency(args.tts_chunk_latency, seed=2)), clock),
+        microphone=FakeMicrophone(latency=Latency(args.listen_latency, args.sigma, seed=3), speed=args.speed),
+        recognizer=recognizer, model=model(8), fast_model=model(9), output=args.player,
+        player=(lambda command: SimulatedPlayer(clock, args.speed)) if args.player == "pipe" else None,
+        player_command=["simulated"])
+    next_utterance = clock.timed("listen", worker.mic.next_utterance)
+
+    def listen(timeout=None, cancelled=None):
+        audio = next_utterance(timeout, cancelled)
+        clock.heard()
+        return audio
+    worker.mic.next_utterance = listen
+
+    engine = worker.engine
+    engine.route = clock.timed("route", engine.route)
+    services = FakeServices(*(Latency(args.service_latency, args.sigma, seed=seed) for seed in (5, 6, 7)))
+    for name in ("fetch_weather", "fetch_headlines", "fetch_wikipedia"):
+        setattr(services, name, clock.timed_async("services", getattr(services, name)))
+    engine.services = services
+    return worker
+
+
+async def turn(worker, clock, command):
+    """One spoken turn, the way command_loop runs a microphone request."""
+    worker.mic.say(command)
+    clock.start_turn()
+    start = time.perf_counter()
+    request = await worker.listen_async()
+    await worker.process_command(request)
+    clock.turn["end to end"] = time.perf_counter() - start
+    result = dict(clock.turn, command=command, request=request)
+    clock.turn = None
+    return result
+
+
+def percentile(values, q):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def summarize(turns):
+    summary = {}
+    for stage in STAGES:
+        values = [t[stage] for t in turns if stage in t]
+        if values:
+            summary[stage] = {"count": len(values), "p50": percentile(values, 50), "p95": percentile(values, 95),
+                              "p99": percentile(values, 99)}
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--player", choices=["memory", "pipe"], default="memory",
+                        help="decode in memory for the audio output thread, or stream to a player's stdin")
+    parser.add_argument("--speed", type=float, default=10.0, help="speaking and playback speed relative to real time")
+    parser.add_argument("--sigma", type=float, default=0.3, help="spread of every latency distribution (log-normal)")
+    parser.add_argument("--listen-latency", type=float, default=0.0, help="extra end-of-speech detection delay, seconds")
+    parser.add_argument("--stt-latency", type=float, default=0.3)
+    parser.add_argument("--llm-latency", type=float, default=0.6, help="Gemini delay before the first chunk")
+    parser.add_argument("--llm-chunk-latency", type=float, default=0.05)
+    parser.add_argument("--tts-latency", type=float, default=0.15, help="edge_tts delay before the first audio")
+    parser.add_argument("--tts-chunk-latency", type=float, default=0.01)
+    parser.add_argument("--service-latency", type=float, default=0.15, help="weather, news and Wikipedia")
+    parser.add_argument("--json", help="save the results to this file")
+    parser.add_argument("--compare", help="results file of an earlier run to compare against")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtCore import QCoreApplication
+    app = QCoreApplication(sys.argv)
+
+    clock = StageClock()
+    workdir = tempfile.mkdtemp(prefix="dex-e2e-")
+    worker = make_worker(args, clock, workdir)
+    import tts
+    asyncio.set_event_loop(worker.loop)
+    turns, errors = [], []
+    try:
+        for i in range(args.turns):
+            command = COMMANDS[i % len(COMMANDS)]
+            try:
+                turns.append(worker.loop.run_until_complete(turn(worker, clock, command)))
+            except Exception as e:
+                errors.append(f"'{command}': {type(e).__name__}: {e}")
+    finally:
+        worker.engine.chat_session.model.close()
+        worker.loop.run_until_complete(worker.http.close())
+        worker.close_loop()
+        tts.close_output()
+
+    summary = summarize(turns)
+    previous = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        print(f"Compared with {args.compare} (commit {previous.get('commit')}, {previous.get('date')})")
+    print(f"{len(turns)} turns, {args.player} player, speech at {args.speed:g}x real time")
+    print(f"{'stage':<13}{'count':>6}{'p50':>10}{'p95':>10}{'p99':>10}" + (f"{'p50 was':>10}{'change':>9}" if previous else ""))
+    for stage, row in summary.items():
+        line = f"{stage:<13}{row['count']:>6}" + "".join(f"{row[q] * 1000:8.1f}ms" for q in ("p50", "p95", "p99"))
+        old = previous and previous["stages"].get(stage)
+        if old:
+            line += f"{old['p50'] * 1000:8.1f}ms{(row['p50'] - old['p50']) / old['p50'] * 100 if old['p50'] else 0:+8.0f}%"
+        print(line)
+
+    if args.json:
+        report = {"commit": git_commit(), "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                  "config": vars(args), "stages": summary, "turns": turns}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+
+    missing_audio = [t["command"] for t in turns if "first audio" not in t]
+    for error in errors:
+        print(f"🔴 {error}")
+    if missing_audio:
+        print(f"🔴 No audio played for: {', '.join(missing_audio)}")
+    if errors or missing_audio:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
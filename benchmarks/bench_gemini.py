@@ -0,0 +1,128 @@
+"""
+Compares Gemini call latency with and without deadlines, hedging, retries and model tiering.
+
+Uses local fake models that inject delays, stalls and 503 errors, so no API key is needed:
+    python benchmarks/bench_gemini.py --requests 300
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gemini_client import TieredModel
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class ServiceUnavailable(Exception):
+    code = 503
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel: log-normal latency, occasional long stalls and 503s."""
+
+    def __init__(self, median=0.04, stall=1.0, stall_rate=0.05, error_rate=0.03, seed=0):
+        self.median = median
+        self.stall = stall
+        self.stall_rate = stall_rate
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+    def generate_content(self, contents, stream=False):
+        roll = self.random.random()
+        delay = self.median * self.random.lognormvariate(0, 0.3)
+        if roll < self.stall_rate:
+            delay += self.stall
+        time.sleep(delay)
+        if roll > 1 - self.error_rate:
+            raise ServiceUnavailable("503 The model is overloaded.")
+        if stream:
+            return iter([FakeResponse("Sure. "), FakeResponse("Here you go.")])
+        return FakeResponse("Sure. Here you go.")
+
+
+PROMPTS = [
+    "tell me a joke",
+    "what is the capital of france",
+    "explain how a transformer model works in detail",
+    "write a short story about a robot learning to paint",
+]
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+def run(model, requests, concurrency):
+    def one(i):
+        prompt = [{"role": "user", "parts": [PROMPTS[i % len(PROMPTS)]]}]
+        start = time.perf_counter()
+        try:
+            model.generate_content(prompt)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, type(e).__name__
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    latencies = [latency for latency, error in results if error is None]
+    errors = [error for _, error in results if error is not None]
+    return latencies, errors
+
+
+def plain(args):
+    # One model, no deadline worth the name, no hedging, no retries: the old behaviour.
+    return TieredModel({"default": FakeModel(args.median, args.stall)}, deadline=3600, hedge_percentile=0, retries=0)
+
+
+def managed(args):
+    return TieredModel(
+        {"default": FakeModel(args.median, args.stall, seed=1), "fast": FakeModel(args.median / 2, args.stall, seed=2)},
+        deadline=args.deadline, hedge_after=args.median * 3, backoff=args.median,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--median", type=float, default=0.04, help="fake model median latency in seconds")
+    parser.add_argument("--stall", type=float, default=1.0, help="extra delay of a stalled request")
+    parser.add_argument("--deadline", type=float, default=2.0)
+    args = parser.parse_args()
+
+    rows = {}
+    for name, factory in (("plain", plain), ("managed", managed)):
+        model = factory(args)
+        latencies, errors = run(model, args.requests, args.concurrency)
+        rows[name] = (latencies, errors, model.stats())
+        model.close()
+
+    print(f"{'config':<10}{'p50':>9}{'p95':>9}{'p99':>9}{'errors':>8}")
+    for name, (latencies, errors, _) in rows.items():
+        p50, p95, p99 = (percentile(latencies, q) * 1000 for q in (50, 95, 99))
+        print(f"{name:<10}{p50:7.0f}ms{p95:7.0f}ms{p99:7.0f}ms{len(errors):8d}")
+
+    print("\nper tier (managed):")
+    for tier, stats in rows["managed"][2].items():
+        print(f"  {tier:<8} {stats['count']:4d} ok  p50<={stats['p50']}s p95<={stats['p95']}s  "
+              f"hedges {stats['hedges']} (won {stats['hedge_wins']})  retries {stats['retries']}  "
+              f"timeouts {stats['timeouts']}  errors {stats['errors']}")
+
+    plain_p99 = percentile(rows["plain"][0], 99)
+    managed_p99 = percentile(rows["managed"][0], 99)
+    if managed_p99 >= plain_p99 or len(rows["managed"][1]) > len(rows["plain"][1]):
+        print("FAIL: hedging and retries did not improve the tail")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
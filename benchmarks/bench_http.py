@@ -0,0 +1,147 @@
+"""
+Checks the shared HTTP client against a local stub server, fully offline.
+
+Reports per-request latency and how many TCP connections were opened for
+one-connection-per-call fetching (like the old requests.get calls) and for
+HttpClient, then checks concurrency, retries and per-host timeouts:
+    python benchmarks/bench_http.py --requests 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import services
+from http_client import HttpClient, HttpError
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    wbufsize = -1  # send headers and body in one segment
+    connections = 0
+    flaky_failures = 0
+
+    def setup(self):
+        super().setup()
+        StubHandler.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/slow"):
+            time.sleep(0.1)
+        if self.path.startswith("/hang"):
+            time.sleep(2)
+        if self.path.startswith("/flaky") and StubHandler.flaky_failures < 2:
+            StubHandler.flaky_failures += 1
+            return self.reply(503, {"error": "try again"})
+        if self.path.startswith("/weather"):
+            return self.reply(200, {"cod": 200, "main": {"temp": 21.5}, "weather": [{"description": "clear sky"}]})
+        if self.path.startswith("/news"):
+            return self.reply(200, {"articles": [{"title": f"Headline {i}"} for i in range(5)]})
+        self.reply(200, {"ok": True})
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer(ThreadingHTTPServer):
+    request_queue_size = 64  # the default of 5 drops SYNs from a burst of concurrent connects
+    daemon_threads = True
+
+
+def fetch_without_pool(url, count):
+    for _ in range(count):
+        with urllib.request.urlopen(url) as response:
+            json.loads(response.read())
+
+
+async def fetch_with_pool(http, url, count):
+    for _ in range(count):
+        await http.get_json(url)
+
+
+def check(name, ok):
+    print(f"{'✓' if ok else '✗'} {name}")
+    return ok
+
+
+async def run_checks(base, count):
+    results = []
+
+    StubHandler.connections = 0
+    start = time.perf_counter()
+    await asyncio.get_running_loop().run_in_executor(None, fetch_without_pool, base + "/ping", count)
+    unpooled = time.perf_counter() - start
+    unpooled_connections = StubHandler.connections
+
+    http = HttpClient(backoff=0.01)
+    StubHandler.connections = 0
+    start = time.perf_counter()
+    await fetch_with_pool(http, base + "/ping", count)
+    pooled = time.perf_counter() - start
+    pooled_connections = StubHandler.connections
+
+    print(f"{'new connection per call':<24} {unpooled / count * 1000:7.2f} ms/request  {unpooled_connections} connections")
+    print(f"{'HttpClient (pooled)':<24} {pooled / count * 1000:7.2f} ms/request  {pooled_connections} connections")
+    results.append(check("pooled client reuses keep-alive connections", pooled_connections == 1))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(http.get_json(base + "/slow") for _ in range(10)))
+    elapsed = time.perf_counter() - start
+    results.append(check(f"10 concurrent 100 ms requests overlap ({elapsed * 1000:.0f} ms)", elapsed < 0.5))
+
+    data = await http.get_json(base + "/flaky")
+    results.append(check("503 replies are retried", data == {"ok": True}))
+
+    host_timeout = HttpClient(host_timeouts={"127.0.0.1": 0.2}, retries=0)
+    try:
+        await host_timeout.get_json(base + "/hang")
+        timed_out = False
+    except HttpError:
+        timed_out = True
+    await host_timeout.close()
+    results.append(check("per-host timeout is enforced", timed_out))
+
+    services.WEATHER_URL = base + "/weather"
+    services.NEWS_URL = base + "/news"
+    os.environ.setdefault("OPENWEATHER_API_KEY", "stub")
+    os.environ.setdefault("NEWSAPI_KEY", "stub")
+    weather = await services.fetch_weather(http, "london")
+    headlines = await services.fetch_headlines(http)
+    results.append(check("weather and news fetchers parse stub replies", weather["main"]["temp"] == 21.5 and len(headlines) == 5))
+
+    await http.close()
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        ok = asyncio.run(run_checks(base, args.requests))
+    finally:
+        server.shutdown()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compares the old substring if/elif routing with the compiled intent matcher.
+
+Runs the golden corpus in benchmarks/intent_corpus.jsonl, prints every
+utterance whose route changed, checks the new routes against the expected
+intents and reports the routing cost per utterance:
+    python benchmarks/bench_intents.py
+Exits with status 1 if any utterance is routed differently from the corpus.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import intents
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_corpus.jsonl")
+
+# The order of the substring checks in app.py before the intent registry.
+LEGACY_CHAIN = [
+    ("hello", ["hello"]),
+    ("time", ["time"]),
+    ("date", ["date"]),
+    ("wikipedia", ["wikipedia"]),
+    ("play", ["play"]),
+    ("change_voice", ["change your voice"]),
+    ("open_youtube", ["open youtube"]),
+    ("search_google", ["search google for"]),
+    ("weather", ["weather"]),
+    ("news", ["news"]),
+    ("screenshot", ["take a screenshot"]),
+    ("shutdown", ["shutdown the system"]),
+    ("restart", ["restart the system"]),
+    ("goodbye", ["goodbye", "exit"]),
+]
+
+
+def legacy_route(request):
+    for name, needles in LEGACY_CHAIN:
+        if any(needle in request for needle in needles):
+            return name
+    return None
+
+
+def load_corpus(path):
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    utterances = [case["utterance"] for case in corpus]
+
+    print("Routing changes (old -> new):")
+    failures = 0
+    for case in corpus:
+        old, new = legacy_route(case["utterance"]), intents.route(case["utterance"])
+        marker = "  " if new == case["intent"] else "✗ "
+        failures += new != case["intent"]
+        if old != new or new != case["intent"]:
+            print(f"{marker}{case['utterance']!r}: {old} -> {new} (expected {case['intent']})")
+
+    for name, router in [("substring chain", legacy_route), ("intent matcher", intents.route)]:
+        seconds = min(timeit.repeat(lambda: [router(u) for u in utterances], number=args.repeat, repeat=3))
+        correct = sum(router(case["utterance"]) == case["intent"] for case in corpus)
+        per_call = seconds / (args.repeat * len(utterances)) * 1e6
+        print(f"{name:<16} {per_call:6.2f} µs/utterance  {correct}/{len(corpus)} match the corpus")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
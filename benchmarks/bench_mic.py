@@ -0,0 +1,58 @@
+"""
+Runs MicrophoneStream over WAV files standing in for the microphone.
+
+With no arguments a synthetic clip with three known utterances is used:
+    python benchmarks/bench_mic.py [clip.wav ...]
+Prints every utterance found and how long segmentation took. The old
+per-command path also spent a fixed second on adjust_for_ambient_noise.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+
+from audio_clips import make_clip
+from mic import MicrophoneStream
+
+SYNTHETIC_SEGMENTS = [(1.5, 2.7), (4.0, 4.8), (6.5, 8.5)]
+
+
+def segment(path):
+    stream = MicrophoneStream(source=sr.AudioFile(path))
+    start = time.perf_counter()
+    stream.start()
+    utterances = []
+    while True:
+        audio = stream.next_utterance()
+        if audio is None:
+            break
+        utterances.append(len(audio.frame_data) / (audio.sample_rate * audio.sample_width))
+    elapsed = time.perf_counter() - start
+    stream.close()
+    return utterances, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("clips", nargs="*")
+    args = parser.parse_args()
+
+    clips = args.clips
+    if not clips:
+        path = os.path.join(tempfile.gettempdir(), "dex_mic_clip.wav")
+        clips = [make_clip(path, 10.0, SYNTHETIC_SEGMENTS)]
+        print(f"Synthetic clip with utterances at {SYNTHETIC_SEGMENTS}")
+
+    for path in clips:
+        utterances, elapsed = segment(path)
+        lengths = ", ".join(f"{seconds:.2f}s" for seconds in utterances)
+        print(f"{os.path.basename(path)}: {len(utterances)} utterances [{lengths}] segmented in {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Measures GUI-thread CPU per minute of the orb animation in each state, QMovie against OrbAnimator.
+
+Writes synthetic animated GIFs (or uses --gif-dir with the real idle/listening/thinking.gif)
+and runs offscreen, so no display is needed:
+    python benchmarks/bench_orb.py --seconds 5
+"""
+import argparse
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QEventLoop, QSize, QTimer
+from PyQt5.QtGui import QMovie
+from PyQt5.QtWidgets import QApplication, QLabel
+
+import orb
+
+STATES = ["idle", "listening", "thinking"]
+
+
+# --- Synthetic GIFs ---
+def lzw_literals(pixels):
+    """GIF LZW data that only uses literal codes: valid, uncompressed, and quick to build with NumPy."""
+    clear, end = 256, 257
+    chunks = []
+    for start in range(0, len(pixels), 250):
+        # A clear code every 250 literals keeps the code width at 9 bits.
+        chunks.append(np.array([clear], dtype=np.uint16))
+        chunks.append(pixels[start:start + 250].astype(np.uint16))
+    chunks.append(np.array([end], dtype=np.uint16))
+    codes = np.concatenate(chunks)
+    bits = ((codes[:, None] >> np.arange(9, dtype=np.uint16)) & 1).astype(np.uint8).ravel()
+    data = np.packbits(bits, bitorder="little").tobytes()
+    return b"".join(bytes([len(data[i:i + 255])]) + data[i:i + 255] for i in range(0, len(data), 255)) + b"\x00"
+
+
+def write_gif(path, size=400, frames=30, delay_ms=40, hue=0):
+    palette = bytearray()
+    for i in range(256):
+        palette += bytes([(i * (1 + hue)) % 256, i, 255 - i // 2])
+    y, x = np.mgrid[0:size, 0:size]
+    distance = np.hypot(x - size / 2, y - size / 2)
+    with open(path, "wb") as f:
+        f.write(b"GIF89a" + struct.pack("<HHBBB", size, size, 0xF7, 0, 0) + bytes(palette))
+        f.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00")  # loop forever
+        for n in range(frames):
+            pulse = size / 4 * (1 + 0.3 * np.sin(2 * np.pi * n / frames))
+            pixels = np.clip(255 - np.abs(distance - pulse) * 4, 0, 255).astype(np.uint8).ravel()
+            f.write(b"\x21\xf9\x04\x04" + struct.pack("<H", delay_ms // 10) + b"\x00\x00")
+            f.write(b"\x2c" + struct.pack("<HHHHB", 0, 0, size, size, 0) + b"\x08" + lzw_literals(pixels))
+        f.write(b"\x3b")
+
+
+# --- Measurement ---
+def gui_cpu_per_minute(seconds):
+    """Runs the Qt event loop for `seconds` and returns the GUI thread's CPU seconds per minute."""
+    start = time.thread_time()
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec_()
+    return (time.thread_time() - start) / seconds * 60
+
+
+class LegacyOrb:
+    """What DexUI did before: three QMovies scaled per frame, started and never stopped."""
+
+    def __init__(self, label, paths):
+        self.label = label
+        self.movies = {}
+        for state in STATES:
+            movie = QMovie(paths[state])
+            movie.setScaledSize(QSize(200, 200))
+            self.movies[state] = movie
+
+    def set_state(self, state):
+        self.label.setMovie(self.movies[state])
+        self.movies[state].start()
+
+    def set_visible(self, visible):
+        pass  # QMovie keeps decoding while the window is minimized
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0, help="measurement time per state")
+    parser.add_argument("--gif-dir", help="directory with idle.gif, listening.gif and thinking.gif")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    directory = args.gif_dir or tempfile.mkdtemp()
+    paths = {state: os.path.join(directory, f"{state}.gif") for state in STATES}
+    if not args.gif_dir:
+        for hue, state in enumerate(STATES):
+            write_gif(paths[state], hue=hue)
+
+    results = {}
+    for name in ("QMovie", "OrbAnimator"):
+        label = QLabel()
+        label.setFixedSize(200, 200)
+        label.show()
+        start = time.perf_counter()
+        player = LegacyOrb(label, paths) if name == "QMovie" else orb.OrbAnimator(label, paths)
+        row = {}
+        for state in STATES:
+            player.set_state(state)
+            if state == "idle":
+                row["first frame"] = time.perf_counter() - start
+            row[state] = gui_cpu_per_minute(args.seconds)
+        player.set_state("idle")
+        label.hide()
+        player.set_visible(False)
+        row["minimized"] = gui_cpu_per_minute(args.seconds)
+        results[name] = row
+        label.deleteLater()
+
+    columns = ["idle", "listening", "thinking", "minimized"]
+    print("GUI-thread CPU seconds per minute")
+    print(f"{'player':<13}" + "".join(f"{c:>11}" for c in columns) + f"{'first frame':>13}")
+    for name, row in results.items():
+        print(f"{name:<13}" + "".join(f"{row[c]:11.2f}" for c in columns) + f"{row['first frame'] * 1000:11.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
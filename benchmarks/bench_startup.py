@@ -0,0 +1,118 @@
+"""
+Measures cold-start cost of the front ends: import time of app.py and main.py and time to the first paint of DexUI.
+
+Each run is a fresh interpreter, so module caches never carry over. Runs offscreen by default:
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# --- Child Process ---
+def child(target):
+    """Runs inside the measured interpreter and prints one JSON line."""
+    spawned_at = float(os.environ["DEX_BENCH_SPAWNED_AT"])
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    result = {"interpreter": time.time() - spawned_at}
+    start = time.perf_counter()
+    try:
+        module = __import__(target)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        print(json.dumps(result), flush=True)
+        os._exit(0)
+    result["import"] = time.perf_counter() - start
+
+    if target == "app":
+        from PyQt5.QtCore import QEvent, QObject
+        from PyQt5.QtWidgets import QApplication
+
+        class FirstPaint(QObject):
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Paint:
+                    result["first_paint"] = time.time() - spawned_at
+                    print(json.dumps(result), flush=True)
+                    os._exit(0)
+                return False
+
+        qt_app = QApplication(sys.argv)
+        window = module.DexUI()
+        paint_filter = FirstPaint()
+        window.installEventFilter(paint_filter)
+        window.show()
+        qt_app.exec_()
+    print(json.dumps(result), flush=True)
+    os._exit(0)
+
+
+# --- Parent ---
+def run_child(target, importtime=False):
+    env = dict(os.environ, DEX_BENCH_SPAWNED_AT=repr(time.time()), DEX_PREFETCH="0", DEX_WARMUP="0")
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + [__file__, "--child", target]
+    proc = subprocess.run(command, capture_output=True, text=True, env=env, timeout=120)
+    lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+    if not lines:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "no output"}, proc.stderr
+    return json.loads(lines[-1]), proc.stderr
+
+
+def slowest_imports(importtime_log, count=8):
+    """Top-level imports by cumulative time (microseconds) from a -X importtime log."""
+    totals = []
+    for line in importtime_log.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)", line)
+        if match and len(match.group(3)) == 2:  # imported directly by the front end
+            totals.append((int(match.group(2)), match.group(4)))
+    return sorted(totals, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--json", help="write the measurements to this file")
+    args = parser.parse_args()
+    if args.child:
+        child(args.child)
+        return
+
+    report = {}
+    for target in ("app", "main"):
+        runs = [run_child(target)[0] for _ in range(args.runs)]
+        errors = [r["error"] for r in runs if "error" in r]
+        if errors:
+            print(f"{target}.py: could not start here ({errors[0]})")
+            report[target] = {"error": errors[0]}
+            continue
+        row = {}
+        for field in ("interpreter", "import", "first_paint"):
+            values = [r[field] for r in runs if field in r]
+            if values:
+                row[field] = {"first": values[0], "median": statistics.median(values), "max": max(values)}
+        report[target] = row
+        print(f"{target}.py")
+        for field, values in row.items():
+            print(f"  {field:<12} first {values['first'] * 1000:7.0f}ms   median {values['median'] * 1000:7.0f}ms"
+                  f"   max {values['max'] * 1000:7.0f}ms")
+        _, log = run_child(target, importtime=True)
+        report[target]["slowest_imports"] = slowest_imports(log)
+        print("  slowest imports: " + ", ".join(f"{name} {us / 1000:.0f}ms" for us, name in report[target]["slowest_imports"]))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
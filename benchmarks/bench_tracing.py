@@ -0,0 +1,94 @@
+"""
+Measures the cost of a tracing span when tracing is off and when it is on, and checks the trace file and /metrics.
+
+Spans wrap a trivial block, so the numbers are pure instrumentation overhead:
+    python benchmarks/bench_tracing.py --spans 200000
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tracing
+
+# A turn is a few dozen spans and takes seconds; anything under this is lost in the noise.
+MAX_DISABLED_NS = 1000
+
+
+def per_span_ns(tracer, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        with tracer.span("bench"):
+            pass
+    return (time.perf_counter() - start) / count * 1e9
+
+
+def baseline_ns(count):
+    start = time.perf_counter()
+    for _ in range(count):
+        pass
+    return (time.perf_counter() - start) / count * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spans", type=int, default=200000)
+    parser.add_argument("--port", type=int, default=19464, help="port for the /metrics check")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="dex-trace-")
+    path = os.path.join(workdir, "trace.jsonl")
+    off = tracing.Tracer(enabled=False)
+    on = tracing.Tracer(enabled=True, path=path, max_bytes=256 * 1024, backups=2)
+
+    empty = baseline_ns(args.spans)
+    disabled = per_span_ns(off, args.spans) - empty
+    enabled = per_span_ns(on, args.spans // 10) - empty
+    print(f"span overhead  off {disabled:8.0f} ns   on {enabled:8.0f} ns")
+
+    on.start_turn()
+    with on.span("listen"):
+        time.sleep(0.02)
+    with on.span("recognize"):
+        time.sleep(0.01)
+    try:
+        with on.span("handle_chat"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    total, breakdown = on.end_turn()
+    print(tracing.format_breakdown(total, breakdown))
+
+    on.serve_metrics(args.port)
+    with urllib.request.urlopen(f"http://127.0.0.1:{args.port}/metrics", timeout=5) as response:
+        metrics = response.read().decode("utf-8")
+    on.close()
+
+    files = sorted(glob.glob(path + "*"))
+    with open(path, "r", encoding="utf-8") as f:
+        last = [json.loads(line) for line in f][-1]
+    print(f"trace files: {', '.join(os.path.basename(f) for f in files)}; last span: {last}")
+
+    problems = []
+    if disabled > MAX_DISABLED_NS:
+        problems.append(f"a disabled span costs {disabled:.0f} ns")
+    if len(files) != 3 or any(os.path.getsize(f) > 256 * 1024 for f in files):
+        problems.append("the trace file did not rotate")
+    for expected in ('dex_span_seconds_count{span="listen"} 1', 'dex_span_errors_total{span="handle_chat"} 1',
+                     'dex_span_seconds_bucket{span="bench",le="+Inf"}', "dex_turns_total 1"):
+        if expected not in metrics:
+            problems.append(f"/metrics is missing {expected!r}")
+    for problem in problems:
+        print(f"🔴 {problem}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Compares the capped list-view transcript against appending HTML to a QTextEdit.
+
+Adds messages in bursts like the worker does and reports the CPU time per message
+and the resident memory growth. Runs offscreen, no display needed:
+    python benchmarks/bench_transcript.py --messages 5000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication, QTextEdit
+
+from transcript import PAGE_SIZE, TranscriptModel, TranscriptView
+
+MESSAGE = "Here is what I found about that topic. " * 4
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return float("nan")
+
+
+def html_append(widget, sender, message):
+    # What DexUI.add_message used to do, bubble styling and all.
+    align = "right" if sender.lower() == 'you' else "left"
+    bg_color = "#374151" if sender.lower() == 'you' else "#00BFFF"
+    text_color = "white" if sender.lower() == 'you' else "black"
+    widget.append(f"""
+        <div style='text-align: {align}; margin-bottom: 12px;'>
+            <span style='background-color: {bg_color}; color: {text_color}; padding: 10px 15px; border-radius: 18px; display: inline-block; max-width: 75%; font-weight: 500;'>
+                {message}
+            </span>
+        </div>
+        """)
+
+
+def run(app, name, widget, add, messages, burst):
+    widget.resize(460, 400)
+    widget.show()
+    app.processEvents()
+    before = rss_mb()
+    # CPU time, so the idle waits between bursts do not count.
+    start = time.process_time()
+    tail_start = None
+    for i in range(0, messages, burst):
+        if i >= messages - messages // 10 and tail_start is None:
+            tail_start = time.process_time()
+        for j in range(i, min(i + burst, messages)):
+            add(widget, "You" if j % 2 == 0 else "Dex", f"{j}: {MESSAGE}")
+        # Let batching timers fire and the view repaint, as the GUI loop would.
+        loop = QEventLoop()
+        QTimer.singleShot(60, loop.quit)
+        loop.exec_()
+    total = time.process_time() - start
+    tail = time.process_time() - tail_start
+    widget.hide()
+    return name, total / messages * 1000, tail / (messages // 10) * 1000, rss_mb() - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=3000)
+    parser.add_argument("--burst", type=int, default=5, help="messages emitted at once by the worker")
+    parser.add_argument("--max-messages", type=int, default=200)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    spill = os.path.join(tempfile.mkdtemp(), "transcript.jsonl")
+    view = TranscriptView(TranscriptModel(spill, max_messages=args.max_messages))
+    rows = [
+        run(app, "QTextEdit", QTextEdit(), html_append, args.messages, args.burst),
+        run(app, "list view", view, lambda w, s, m: w.add_message(s, m), args.messages, args.burst),
+    ]
+    print(f"{'transcript':<12}{'CPU ms/msg':>12}{'last 10%':>10}{'RSS +MB':>10}")
+    for name, per_message, tail, growth in rows:
+        print(f"{name:<12}{per_message:12.2f}{tail:10.2f}{growth:10.1f}")
+    print(f"list view keeps {view.transcript.rowCount()} messages in memory, "
+          f"{len(view.transcript.offsets)} offsets for reading back from disk")
+
+    if view.transcript.rowCount() > args.max_messages + PAGE_SIZE:
+        print("FAIL: the transcript grew past its cap")
+        sys.exit(1)
+    view.transcript.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compares time-to-first-audio of streaming speech, to a pipe player and decoded in memory, against buffered playback.
+
+Uses the edge_tts stand-in from fakes.py and a null audio sink, so no network or audio device is needed:
+    python benchmarks/bench_tts.py
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tts
+from audio_out import AudioOutput, NullSink
+from fakes import FakeCommunicate, Latency
+
+FIRST_CHUNK_LATENCY = 0.15
+CHUNK_LATENCY = 0.01
+
+
+def communicate(text):
+    return FakeCommunicate(text, "fake", Latency(FIRST_CHUNK_LATENCY), Latency(CHUNK_LATENCY))
+
+
+class NullPlayer:
+    async def write(self, chunk):
+        pass
+
+    async def finish(self):
+        pass
+
+
+async def measure(text, runs, output):
+    piped, decoded, buffered = [], [], []
+    for _ in range(runs):
+        piped.append(await tts.speak_streaming(text, "fake", player=NullPlayer(), communicate=communicate(text)))
+        decoded.append(await tts.speak_decoded(text, "fake", communicate=communicate(text), output=output))
+        buffered.append(await tts.speak_buffered(text, "fake", communicate=communicate(text), output=output))
+    return statistics.median(piped), statistics.median(decoded), statistics.median(buffered)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    sentence = "This is a sentence that the assistant might say out loud. "
+    cases = [("short", "Opening YouTube."), ("medium", sentence * 3), ("long", sentence * 15)]
+    output = AudioOutput(NullSink(speed=None))
+
+    print(f"{'reply':<8}{'chars':>7}{'pipe TTFA':>12}{'decoded TTFA':>15}{'buffered TTFA':>16}{'speedup':>10}")
+    try:
+        for name, text in cases:
+            piped, decoded, buffered = await measure(text, args.runs, output)
+            print(f"{name:<8}{len(text):>7}{piped * 1000:>10.1f}ms{decoded * 1000:>13.1f}ms{buffered * 1000:>14.1f}ms"
+                  f"{buffered / decoded:>9.1f}x")
+    finally:
+        output.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
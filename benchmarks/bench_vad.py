@@ -0,0 +1,109 @@
+"""
+Measures CPU per second of audio and detection latency of the voice activity
+detector used by hands-free listening, against the per-buffer audioop energy
+check it replaces.
+
+Runs on synthetic clips with known speech onsets, or on your own recordings
+(CPU only, since their onsets are unknown):
+    python benchmarks/bench_vad.py [clip.wav ...]
+"""
+import argparse
+import audioop
+import os
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_clips import make_clip
+from vad import VoiceActivityDetector
+
+CHUNK = 1024  # frames per read, as sr.Microphone delivers them
+SYNTHETIC = [
+    ("quiet room", 30.0, [(2.0, 3.5), (10.0, 11.0), (20.0, 24.0)], 150),
+    ("noisy room", 30.0, [(5.0, 6.0), (15.0, 17.5)], 900),
+    ("silence only", 30.0, [], 150),
+]
+
+
+def read_chunks(path):
+    with wave.open(path, "rb") as f:
+        rate, width = f.getframerate(), f.getsampwidth()
+        chunks = []
+        while True:
+            data = f.readframes(CHUNK)
+            if not data:
+                break
+            chunks.append(data)
+    return rate, width, chunks
+
+
+def run_vad(rate, width, chunks):
+    detector = VoiceActivityDetector(rate)
+    onsets, speaking, position = [], False, 0.0
+    start = time.process_time()
+    for data in chunks:
+        flags = detector.frames(data, width)
+        for i, flag in enumerate(flags):
+            if flag and not speaking:
+                onsets.append(position + i * detector.frame_seconds)
+            speaking = bool(flag)
+        position += len(flags) * detector.frame_seconds
+    return time.process_time() - start, onsets
+
+
+def run_energy(rate, width, chunks, threshold=300):
+    onsets, speaking = [], False
+    start = time.process_time()
+    for index, data in enumerate(chunks):
+        loud = audioop.rms(data, width) > threshold
+        if loud and not speaking:
+            onsets.append(index * CHUNK / rate)
+        speaking = loud
+    return time.process_time() - start, onsets
+
+
+def latencies(true_onsets, detected):
+    result = []
+    for onset in true_onsets:
+        after = [t for t in detected if t >= onset - 0.05]
+        result.append(max(0.0, after[0] - onset) if after else None)
+    return result
+
+
+def report(name, rate, chunks, true_onsets=None):
+    duration = sum(len(c) for c in chunks) / 2 / rate
+    for label, run in [("numpy VAD", run_vad), ("audioop energy", run_energy)]:
+        cpu, onsets = run(rate, 2, chunks)
+        line = f"{name:<14} {label:<15} {cpu / duration * 1000:6.2f} ms CPU/s audio ({cpu / duration * 100:.2f}% of a core)"
+        if true_onsets is not None:
+            found = latencies(true_onsets, onsets)
+            hits = [l for l in found if l is not None]
+            mean = f"{sum(hits) / len(hits) * 1000:.0f} ms" if hits else "n/a"
+            false_starts = max(0, len(onsets) - len(hits))
+            line += f"  detected {len(hits)}/{len(true_onsets)}, mean latency {mean}, {false_starts} false starts"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("clips", nargs="*")
+    args = parser.parse_args()
+
+    if args.clips:
+        for path in args.clips:
+            rate, width, chunks = read_chunks(path)
+            report(os.path.basename(path), rate, chunks)
+        return
+
+    for name, duration, segments, noise in SYNTHETIC:
+        path = os.path.join(tempfile.gettempdir(), f"dex_vad_{name.replace(' ', '_')}.wav")
+        make_clip(path, duration, segments, noise_level=noise)
+        rate, width, chunks = read_chunks(path)
+        report(name, rate, chunks, [start for start, end in segments])
+
+
+if __name__ == "__main__":
+    main()
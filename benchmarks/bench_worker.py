@@ -0,0 +1,89 @@
+"""
+Measures per-command overhead of the worker's persistent event loop against
+the old asyncio.run() per command.
+
+Speech is replaced by a no-op that hands one call to the loop's executor, the
+way real playback does, so only loop and dispatch costs are measured:
+    python benchmarks/bench_worker.py --commands 500
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Caches start empty in a scratch directory, never in ~/.dex, and nothing runs in the background.
+WORKDIR = tempfile.mkdtemp(prefix="dex-worker-")
+os.environ.update(DEX_DATA_CACHE=os.path.join(WORKDIR, "data_cache.json"), DEX_TTS_CACHE_DIR=os.path.join(WORKDIR, "tts"),
+                  DEX_TRANSCRIPT_FILE=os.path.join(WORKDIR, "transcript.jsonl"), DEX_PREFETCH="0", DEX_CHAT_CACHE="0",
+                  DEX_WARMUP="0")
+
+from PyQt5.QtCore import QCoreApplication, QThread, Qt
+
+from app import AssistantWorker
+
+COMMANDS = ["what time is it", "what's the date today", "hello"]
+
+
+async def fake_speak(text):
+    await asyncio.get_running_loop().run_in_executor(None, len, text)
+
+
+def make_worker():
+    worker = AssistantWorker()
+    worker.speak = fake_speak
+    return worker
+
+
+def bench_asyncio_run(count):
+    worker = make_worker()
+    start = time.perf_counter()
+    for i in range(count):
+        asyncio.run(worker.process_command(COMMANDS[i % len(COMMANDS)]))
+    return time.perf_counter() - start
+
+
+def bench_persistent_loop(count):
+    worker = make_worker()
+    thread = QThread()
+    worker.moveToThread(thread)
+    thread.started.connect(worker.run)
+
+    done = threading.Event()
+    finished = [0]
+
+    def on_idle(state):
+        finished[0] += 1
+        if finished[0] == count:
+            done.set()
+
+    worker.orb_state_changed.connect(on_idle, Qt.DirectConnection)
+    thread.start()
+    start = time.perf_counter()
+    for i in range(count):
+        worker.submit(COMMANDS[i % len(COMMANDS)])
+    done.wait()
+    elapsed = time.perf_counter() - start
+    worker.stop()
+    thread.quit()
+    thread.wait()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commands", type=int, default=500)
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    for name, bench in [("asyncio.run per command", bench_asyncio_run), ("persistent worker loop", bench_persistent_loop)]:
+        elapsed = bench(args.commands)
+        print(f"{name:<26} {elapsed / args.commands * 1e6:9.1f} µs/command  ({args.commands} commands in {elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
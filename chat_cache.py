@@ -0,0 +1,139 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".dex", "chat_cache.json")
+DEFAULT_TTL = 24 * 60 * 60  # seconds
+MAX_PROMPT_WORDS = 12  # longer prompts are rarely asked twice word for word
+
+# Words that carry no meaning for the answer, dropped before keying.
+FILLER_WORDS = {"please", "hey", "hi", "dex", "ok", "okay", "so", "um", "uh", "now"}
+# Prompts with any of these refer back to the conversation or to the current
+# moment, so the same words can need a different answer.
+CONTEXT_WORDS = {
+    "it", "its", "that", "this", "these", "those", "he", "she", "him", "her", "his", "hers",
+    "they", "them", "their", "there", "again", "another", "more", "else", "also", "too",
+    "previous", "last", "earlier", "above", "same", "continue", "why",
+    "today", "tonight", "tomorrow", "yesterday", "latest", "current", "currently", "recent",
+    # About the user, or about what was said before.
+    "i", "i'm", "i've", "my", "mine", "myself", "me", "we", "us", "our", "ours",
+    "remember", "said", "say", "ask", "asked", "told", "mean", "meant",
+    # Answers to a question Dex just asked.
+    "yes", "no", "yeah", "yep", "nope", "sure", "right", "correct", "wrong",
+}
+# "me" after these is just how requests are phrased ("tell me a joke"), so it is dropped.
+REQUEST_VERBS = {"tell", "give", "show"}
+# Prompts that open like this follow on from the previous one ("and in french?").
+FOLLOW_UP_OPENERS = {"and", "but", "or", "about", "what about", "how about"}
+
+
+def words(prompt):
+    return re.findall(r"[a-z0-9']+", prompt.lower())
+
+
+class ResponseCache:
+    """
+    Cache of Gemini replies to general-chat prompts that do not depend on
+    the conversation, such as "tell me a joke" or "who are you". Prompts
+    are keyed after lowercasing and dropping punctuation and filler words.
+    Entries expire after ttl seconds, are kept in LRU order bounded by
+    max_entries, and are persisted to a JSON file.
+
+    Off unless DEX_CHAT_CACHE=1; when disabled, get() always misses and
+    put() does nothing.
+    """
+
+    def __init__(self, path=None, ttl=None, max_entries=128, enabled=None):
+        if enabled is None:
+            enabled = os.environ.get("DEX_CHAT_CACHE", "0") == "1"
+        self.enabled = enabled
+        self.path = path or os.environ.get("DEX_CHAT_CACHE_FILE", DEFAULT_CACHE_FILE)
+        if ttl is None:
+            ttl = float(os.environ.get("DEX_CHAT_CACHE_TTL", DEFAULT_TTL))
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # normalized prompt -> {"reply", "created_at", "latency"}
+        self.lock = threading.Lock()  # streamed replies are stored from worker threads
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+        if self.enabled:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                saved = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        for key, entry in saved:
+            self.entries[key] = entry
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_file = self.path + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(list(self.entries.items()), f)
+        os.replace(tmp_file, self.path)
+
+    @staticmethod
+    def key(prompt):
+        """Normalized prompt, or None if the prompt depends on context and must not be cached."""
+        spoken = words(prompt)
+        tokens = [word for i, word in enumerate(spoken) if word not in FILLER_WORDS
+                  and not (word == "me" and i and spoken[i - 1] in REQUEST_VERBS)]
+        if not tokens or len(tokens) > MAX_PROMPT_WORDS or CONTEXT_WORDS.intersection(tokens):
+            return None
+        if tokens[0] in FOLLOW_UP_OPENERS or " ".join(tokens[:2]) in FOLLOW_UP_OPENERS:
+            return None
+        return " ".join(tokens)
+
+    def get(self, prompt):
+        """Returns the cached reply for prompt, or None."""
+        if not self.enabled:
+            return None
+        key = self.key(prompt)
+        with self.lock:
+            if key is None:
+                self.skipped += 1
+                return None
+            entry = self.entries.get(key)
+            if entry is None or time.time() - entry["created_at"] >= self.ttl:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry["latency"]
+            return entry["reply"]
+
+    def put(self, prompt, reply, latency=0.0):
+        key = self.key(prompt) if self.enabled else None
+        if key is None or not reply.strip():
+            return
+        with self.lock:
+            self.entries[key] = {"reply": reply, "created_at": time.time(), "latency": latency}
+            self.entries.move_to_end(key)
+            now = time.time()
+            for old_key in [k for k, e in self.entries.items() if now - e["created_at"] >= self.ttl]:
+                del self.entries[old_key]
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            self.save()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "saved_seconds": self.saved_seconds,
+            "entries": len(self.entries),
+        }
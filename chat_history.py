@@ -0,0 +1,178 @@
+import os
+import threading
+
+MAX_HISTORY_TOKENS = int(os.environ.get("DEX_CHAT_HISTORY_TOKENS", "2000"))
+MIN_RECENT_TURNS = 2  # always sent verbatim, whatever the budget
+SUMMARY_MAX_TOKENS = 300
+
+SUMMARY_PROMPT = (
+    "Update the running summary of a conversation between a user and a voice assistant. "
+    "Keep names, facts, preferences and open questions; drop small talk. "
+    "Answer with the new summary only, in at most {words} words.\n\n"
+    "Current summary:\n{summary}\n\nNew turns:\n{turns}"
+)
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token), good enough for budgeting."""
+    return max(1, len(text) // 4)
+
+
+def content(role, text):
+    return {"role": role, "parts": [text]}
+
+
+class ManagedChat:
+    """
+    A Gemini conversation whose request size stays bounded. The most recent
+    turns are sent verbatim while they fit in max_history_tokens; older
+    turns are folded into a rolling summary, written by the model on a
+    background thread and sent in their place. Requests use the stateless
+    model.generate_content, so any object with that method works, including
+    a local fake.
+
+    max_history_tokens=None keeps every turn, like model.start_chat.
+    """
+
+    def __init__(self, model, max_history_tokens=MAX_HISTORY_TOKENS, min_recent_turns=MIN_RECENT_TURNS):
+        self.model = model
+        self.max_history_tokens = max_history_tokens
+        self.min_recent_turns = min_recent_turns
+        self.turns = []  # (user text, model text, tokens)
+        self.summary = ""
+        self.lock = threading.Lock()
+        self.compacting = False
+        self.requests = 0
+        self.last_request_tokens = 0
+        self.max_request_tokens = 0
+        self.total_request_tokens = 0
+        self.summaries = 0
+
+    @property
+    def history(self):
+        """What is sent before each new prompt, in generate_content's format."""
+        with self.lock:
+            return self._history()
+
+    def _history(self):
+        contents = []
+        if self.summary:
+            contents.append(content("user", f"Summary of our conversation so far: {self.summary}"))
+            contents.append(content("model", "Understood."))
+        for user_text, model_text, _ in self.turns:
+            contents.append(content("user", user_text))
+            contents.append(content("model", model_text))
+        return contents
+
+    def history_tokens(self):
+        with self.lock:
+            return estimate_tokens(self.summary) + sum(tokens for _, _, tokens in self.turns)
+
+    def send_message(self, prompt, stream=False):
+        """Same contract as ChatSession.send_message; the turn is recorded once the reply is complete."""
+        with self.lock:
+            contents = self._history()
+        contents.append(content("user", prompt))
+        tokens = sum(estimate_tokens(part) for c in contents for part in c["parts"])
+        self.requests += 1
+        self.last_request_tokens = tokens
+        self.max_request_tokens = max(self.max_request_tokens, tokens)
+        self.total_request_tokens += tokens
+
+        response = self.model.generate_content(contents, stream=stream)
+        if stream:
+            return StreamedReply(self, prompt, response)
+        self.record(prompt, response.text)
+        return response
+
+    def record(self, prompt, reply):
+        with self.lock:
+            self.turns.append((prompt, reply, estimate_tokens(prompt) + estimate_tokens(reply)))
+            folded = self._overflow()
+            if not folded:
+                return
+            self.compacting = True
+        threading.Thread(target=self._compact, args=(folded,), name="dex-chat-summary", daemon=True).start()
+
+    def _overflow(self):
+        """Oldest turns to fold into the summary, or [] if the history still fits."""
+        if self.max_history_tokens is None or self.compacting:
+            return []
+        total = sum(tokens for _, _, tokens in self.turns)
+        if total + estimate_tokens(self.summary) <= self.max_history_tokens:
+            return []
+        # Fold down to half the budget so a summary is not written on every turn.
+        folded = []
+        for turn in self.turns[:-self.min_recent_turns]:
+            if total <= self.max_history_tokens // 2:
+                break
+            folded.append(turn)
+            total -= turn[2]
+        return folded
+
+    def _compact(self, folded):
+        try:
+            summary = self.summarize(folded)
+        except Exception as e:
+            print(f"🔴 Could not summarize the chat history: {e}")
+            summary = self.summary  # the folded turns are dropped so the budget still holds
+        with self.lock:
+            del self.turns[:len(folded)]
+            self.summary = summary[:SUMMARY_MAX_TOKENS * 4]
+            self.compacting = False
+
+    def summarize(self, turns):
+        transcript = "\n".join(f"User: {user_text}\nAssistant: {model_text}" for user_text, model_text, _ in turns)
+        prompt = SUMMARY_PROMPT.format(words=SUMMARY_MAX_TOKENS * 3 // 4, summary=self.summary or "(none)", turns=transcript)
+        response = self.model.generate_content(prompt)
+        self.summaries += 1
+        return response.text.strip()
+
+    def stats(self):
+        with self.lock:
+            turns = len(self.turns)
+        return {
+            "requests": self.requests,
+            "last_request_tokens": self.last_request_tokens,
+            "max_request_tokens": self.max_request_tokens,
+            "avg_request_tokens": self.total_request_tokens / self.requests if self.requests else 0,
+            "history_tokens": self.history_tokens(),
+            "turns": turns,
+            "summaries": self.summaries,
+        }
+
+
+class StreamedReply:
+    """
+    Wraps a streaming generate_content response. Iterating it yields the
+    chunks as they arrive; the turn is added to the chat once the stream has
+    been read to the end, either by iteration or by resolve().
+    """
+
+    def __init__(self, chat, prompt, response):
+        self.chat = chat
+        self.prompt = prompt
+        self.chunks = iter(response)
+        self.parts = []
+        self.finished = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.parts.append(chunk.text)
+            yield chunk
+        self._finish()
+
+    def resolve(self):
+        for chunk in self.chunks:
+            self.parts.append(chunk.text)
+        self._finish()
+
+    @property
+    def text(self):
+        self.resolve()
+        return "".join(self.parts)
+
+    def _finish(self):
+        if not self.finished:
+            self.finished = True
+            self.chat.record(self.prompt, "".join(self.parts))
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".dex", "data_cache.json")
+# Seconds a value counts as fresh, per source.
+DEFAULT_TTLS = {
+    "weather": 10 * 60,
+    "news": 15 * 60,
+    "wikipedia": 24 * 60 * 60,
+}
+DEFAULT_TTL = 5 * 60
+# A stale value is still served (and refreshed) until it is this many TTLs old.
+MAX_STALE_FACTOR = 6
+
+
+class DataCache:
+    """
+    TTL cache for web lookups with stale-while-revalidate. Fresh values are
+    returned directly; stale ones are returned immediately while a refresh
+    runs in the background. Entries are kept in LRU order, bounded by
+    max_entries, and persisted to a JSON file so they survive restarts.
+    """
+
+    def __init__(self, path=None, ttls=None, max_entries=256):
+        self.path = path or os.environ.get("DEX_DATA_CACHE", DEFAULT_CACHE_FILE)
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # "source:key" -> {"source", "value", "fetched_at", "latency"}
+        self.inflight = {}
+        self.counters = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                saved = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        for cache_key, entry in saved:
+            self.entries[cache_key] = entry
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_file = self.path + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(list(self.entries.items()), f)
+        os.replace(tmp_file, self.path)
+
+    def _count(self, source, field, amount=1):
+        counters = self.counters.setdefault(source, {"hits": 0, "stale_hits": 0, "misses": 0, "saved_seconds": 0.0})
+        counters[field] += amount
+
+    async def get(self, source, key, fetch):
+        """
+        Returns the value for (source, key), awaiting fetch() on a miss.
+        fetch() results of None are passed through but never cached.
+        """
+        cache_key = f"{source}:{key}"
+        entry = self.entries.get(cache_key)
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            ttl = self.ttls.get(source, DEFAULT_TTL)
+            if age < ttl * MAX_STALE_FACTOR:
+                self.entries.move_to_end(cache_key)
+                self._count(source, "saved_seconds", entry["latency"])
+                if age < ttl:
+                    self._count(source, "hits")
+                else:
+                    self._count(source, "stale_hits")
+                    self.refresh(source, key, fetch)
+                return entry["value"]
+        self._count(source, "misses")
+        return await asyncio.shield(self.refresh(source, key, fetch))
+
+    def refresh(self, source, key, fetch):
+        """Starts fetch() for (source, key) in the background and returns its task."""
+        # Concurrent lookups of the same key share one fetch.
+        cache_key = f"{source}:{key}"
+        task = self.inflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(source, key, fetch))
+            self.inflight[cache_key] = task
+            task.add_done_callback(lambda done: self._refresh_done(cache_key, done))
+        return task
+
+    def _refresh_done(self, cache_key, task):
+        self.inflight.pop(cache_key, None)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"🔴 Refresh of {cache_key} failed: {task.exception()}")
+
+    async def _fetch(self, source, key, fetch):
+        start = time.perf_counter()
+        value = await fetch()
+        if value is not None:
+            self.put(source, key, value, time.perf_counter() - start)
+        return value
+
+    def put(self, source, key, value, latency=0.0):
+        cache_key = f"{source}:{key}"
+        self.entries[cache_key] = {"source": source, "value": value, "fetched_at": time.time(), "latency": latency}
+        self.entries.move_to_end(cache_key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.save()
+
+    def stats(self):
+        """Returns hit rate and latency saved, per source and in total."""
+        report = {}
+        total = {"hits": 0, "stale_hits": 0, "misses": 0, "saved_seconds": 0.0}
+        for source, counters in self.counters.items():
+            report[source] = dict(counters)
+            for field in total:
+                total[field] += counters[field]
+        report["total"] = total
+        for counters in report.values():
+            lookups = counters["hits"] + counters["stale_hits"] + counters["misses"]
+            counters["hit_rate"] = (counters["hits"] + counters["stale_hits"]) / lookups if lookups else 0.0
+        report["entries"] = len(self.entries)
+        return report
@@ -0,0 +1,436 @@
+"""
+Headless command engine shared by app.py, main.py and batch runs.
+
+Batch mode replays text commands from a JSONL file through the engine with
+local stand-ins for Gemini, the web services and speech, and writes every
+response with its timing to JSONL:
+
+    python engine.py commands.jsonl --out results.jsonl --parallel 8
+
+Each input line is an object with the command under "text" (or
+"utterance"); an optional "intent" is checked against the routed intent.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import webbrowser
+
+import genai_request as ai
+import intents
+import services
+import tracing
+from http_client import HttpError
+
+
+# --- Front End Interface ---
+class FrontEnd:
+    """
+    What the engine needs from a front end: a voice, an ear, and the desktop
+    actions some commands take. The action defaults do the real thing.
+    """
+
+    async def speak(self, text):
+        raise NotImplementedError
+
+    async def speak_stream(self, sentences):
+        """Speaks an async iterable of sentences as they arrive."""
+        async for sentence in sentences:
+            await self.speak(sentence)
+
+    async def speak_many(self, texts):
+        for text in texts:
+            await self.speak(text)
+
+    async def listen_async(self):
+        """Returns the next thing the user says, lower-cased, or "" if nothing was understood."""
+        return ""
+
+    def next_voice(self):
+        """Switches to the next voice and returns its name."""
+        return None
+
+    def open_url(self, url):
+        webbrowser.open(url)
+
+    def play_on_youtube(self, song):
+        import pywhatkit as pwk  # probes the network on import, so load it only when needed
+        pwk.playonyt(song)
+
+    def screenshot(self, path):
+        import pyautogui  # slow to import, and only screenshots need it
+        pyautogui.screenshot().save(path)
+
+    def system(self, command):
+        os.system(command)
+
+
+# --- Command Engine ---
+class CommandEngine:
+    """
+    Routes a text command to its handler and runs it. Handlers talk to the
+    user only through the front end, so the same code serves the window,
+    the console and batch runs. chat_session is set by the front end once
+    the Gemini session exists; services can be swapped for local fakes.
+    """
+
+    def __init__(self, frontend, http, data_cache, home_city=None, chat_session=None, services_backend=None,
+                 todo_file="todo.txt"):
+        self.frontend = frontend
+        self.http = http
+        self.data_cache = data_cache
+        self.home_city = home_city
+        self.chat_session = chat_session
+        self.services = services_backend or services
+        self.todo_file = todo_file
+        # Intent name (see intents.INTENTS) -> handler; anything else goes to the AI.
+        self.handlers = {
+            "hello": self.handle_hello,
+            "time": self.handle_time,
+            "date": self.handle_date,
+            "wikipedia": self.handle_wikipedia,
+            "play": self.handle_play,
+            "play_music": self.handle_play,
+            "change_voice": self.handle_change_voice,
+            "open_youtube": self.handle_open_youtube,
+            "search_google": self.handle_search_google,
+            "generate_image": self.handle_generate_image,
+            "weather": self.handle_weather,
+            "news": self.handle_news,
+            "todo": self.handle_todo,
+            "screenshot": self.handle_screenshot,
+            "shutdown": self.handle_shutdown,
+            "restart": self.handle_restart,
+            "goodbye": self.handle_goodbye,
+        }
+        # Handlers that need the Gemini session.
+        self.chat_handlers = {self.handle_chat, self.handle_generate_image}
+
+    def route(self, request):
+        return self.handlers.get(intents.route(request), self.handle_chat)
+
+    def needs_chat(self, request):
+        return self.route(request) in self.chat_handlers
+
+    async def process(self, request):
+        """Runs the handler for request. Returns False when the assistant should stop."""
+        with tracing.span("route"):
+            handler = self.route(request)
+        with tracing.span(handler.__name__):
+            return await handler(request)
+
+    async def speak(self, text):
+        await self.frontend.speak(text)
+
+    # --- Command Handlers ---
+    async def handle_hello(self, request):
+        await self.speak("Hello! How can I help you?")
+
+    async def handle_time(self, request):
+        now_time = datetime.datetime.now().strftime("%I:%M %p")
+        await self.speak(f"The current time is {now_time}.")
+
+    async def handle_date(self, request):
+        today_date = datetime.datetime.now().strftime("%B %d, %Y")
+        await self.speak(f"Today's date is {today_date}.")
+
+    async def handle_wikipedia(self, request):
+        query = request.replace("wikipedia", "").strip()
+        await self.speak(f"Searching Wikipedia for '{query}'.")
+        try:
+            with tracing.span("fetch", source="wikipedia"):
+                result = await self.data_cache.get("wikipedia", query, lambda: self.services.fetch_wikipedia(query))
+            await self.speak(f"According to Wikipedia, {result}")
+        except Exception:
+            await self.speak(f"Sorry, I couldn't find any information on '{query}'.")
+
+    async def handle_play(self, request):
+        song = request.replace("play", "").strip()
+        if song:
+            await self.speak(f"Now playing {song} on YouTube.")
+            self.frontend.play_on_youtube(song)
+        else:
+            await self.speak("What song would you like me to play?")
+
+    async def handle_change_voice(self, request):
+        self.frontend.next_voice()
+        await self.speak("I've updated my voice. How do I sound?")
+
+    async def handle_open_youtube(self, request):
+        await self.speak("Opening YouTube.")
+        self.frontend.open_url("https://www.youtube.com")
+
+    async def handle_search_google(self, request):
+        query = request.replace("search google for", "").strip()
+        await self.speak(f"Searching Google for {query}.")
+        self.frontend.open_url(f"https://www.google.com/search?q={query}")
+
+    async def handle_generate_image(self, request):
+        image_description = re.sub(r'generate an image of|generate image of|generate an image|generate image', '', request).strip()
+        if not image_description:
+            await self.speak("Of course. What would you like an image of?")
+            image_description = await self.frontend.listen_async()
+            if not image_description:
+                await self.speak("I didn't catch that. Cancelling the request.")
+                return
+
+        await self.speak(f"Okay, generating an image of {image_description}...")
+        image_prompt = (f"Create a URL for a high-quality image of '{image_description}'. "
+                        f"Use this exact format: https://source.unsplash.com/1920x1080/?<query>. "
+                        f"Replace <query> with 2-3 relevant English keywords from my request, separated by commas.")
+        loop = asyncio.get_running_loop()
+        url_response = await loop.run_in_executor(None, ai.send_chat_message, self.chat_session, image_prompt)
+        url_match = re.search(r'https?://\S+', url_response)
+        if not url_match:
+            await self.speak("I'm sorry, I wasn't able to create the image URL.")
+            print(f"Debug: AI response was '{url_response}'")
+            return
+
+        await self.speak("I've found an image for you. Now, I'll save it to your desktop.")
+        try:
+            desktop_path = os.path.join(os.path.expanduser('~'), 'Desktop')
+            if not os.path.exists(desktop_path):
+                desktop_path = os.getcwd()
+                await self.speak("I could not find your desktop, so I will save it in the current folder.")
+            safe_filename = re.sub(r'[\\/*?:"<>|]', "", image_description).replace(" ", "_")
+            file_path = os.path.join(desktop_path, f"{safe_filename}_{int(time.time())}.jpg")
+            await self.services.download_image(self.http, url_match.group(), file_path)
+            await self.speak("Done. The image has been saved to your desktop.")
+        except HttpError as e:
+            await self.speak("Sorry, I had a problem downloading the image.")
+            print(f"🔴 Download error: {e}")
+        except Exception as e:
+            await self.speak("Sorry, I encountered an error while saving the image.")
+            print(f"🔴 File saving error: {e}")
+
+    async def handle_weather(self, request):
+        city = request.split("in ")[-1].strip() if "in " in request else (self.home_city or "your current location")
+        try:
+            with tracing.span("fetch", source="weather"):
+                data = await self.data_cache.get("weather", city.lower(), lambda: self.services.fetch_weather(self.http, city))
+        except Exception:
+            await self.speak("I'm having trouble fetching the weather right now.")
+            return
+        if data is None:
+            await self.speak("Weather service is not configured. Please add an API key.")
+        elif data["cod"] != "404":
+            temp = data["main"]["temp"]
+            weather_desc = data["weather"][0]["description"]
+            await self.speak(f"The temperature in {city} is {temp} degrees Celsius with {weather_desc}.")
+        else:
+            await self.speak("Sorry, I couldn't find the weather for that city.")
+
+    async def handle_news(self, request):
+        try:
+            with tracing.span("fetch", source="news"):
+                headlines = await self.data_cache.get("news", "in", lambda: self.services.fetch_headlines(self.http))
+        except Exception:
+            await self.speak("I'm having trouble fetching the news right now.")
+            return
+        if headlines is None:
+            await self.speak("News service is not configured. Please add an API key.")
+        elif headlines:
+            await self.frontend.speak_many(["Here are the top 3 news headlines:"] + headlines[:3])
+        else:
+            await self.speak("Sorry, I couldn't fetch the news right now.")
+
+    async def handle_todo(self, request):
+        if "add" in request or "new task" in request:
+            task = request.replace("add", "").replace("new task", "").replace("to my to-do list", "").strip()
+            if task:
+                with open(self.todo_file, "a") as file:
+                    file.write(task + "\n")
+                await self.speak(f"Okay, I've added '{task}' to your to-do list.")
+            else:
+                await self.speak("What task should I add?")
+        elif "what are my tasks" in request or "show my tasks" in request:
+            try:
+                with open(self.todo_file, "r") as file:
+                    tasks = file.read().splitlines()
+            except FileNotFoundError:
+                await self.speak("You don't have a to-do list yet.")
+                return
+            if tasks:
+                await self.frontend.speak_many(["Here are the tasks on your to-do list:"] + tasks)
+            else:
+                await self.speak("Your to-do list is empty.")
+        else:
+            await self.speak("You can add a task or ask what your tasks are.")
+
+    async def handle_screenshot(self, request):
+        await self.speak("Taking a screenshot.")
+        self.frontend.screenshot(f"screenshot_{time.time()}.png")
+        await self.speak("Done. The screenshot has been saved in the script's directory.")
+
+    async def handle_shutdown(self, request):
+        await self.speak("Are you sure you want to shut down?")
+        confirmation = await self.frontend.listen_async()
+        if "yes" in confirmation:
+            await self.speak("Shutting down. Goodbye!")
+            self.frontend.system("shutdown /s /t 1")
+        else:
+            await self.speak("Shutdown cancelled.")
+
+    async def handle_restart(self, request):
+        await self.speak("Are you sure you want to restart?")
+        confirmation = await self.frontend.listen_async()
+        if "yes" in confirmation:
+            await self.speak("Restarting now.")
+            self.frontend.system("shutdown /r /t 1")
+        else:
+            await self.speak("Restart cancelled.")
+
+    async def handle_goodbye(self, request):
+        await self.speak("Goodbye!")
+        return False
+
+    async def handle_chat(self, request):
+        await self.speak("One moment while I process that.")
+        await self.frontend.speak_stream(ai.astream_chat_message(self.chat_session, request))
+
+
+# --- Batch Mode ---
+class BatchFrontEnd(FrontEnd):
+    """Records what would be said and done instead of doing it. speech_delay simulates synthesis time per character."""
+
+    def __init__(self, speech_delay=0.0, replies=()):
+        self.responses = []
+        self.actions = []
+        self.speech_delay = speech_delay
+        self.replies = list(replies)  # answers to follow-up questions, in order
+
+    async def speak(self, text):
+        self.responses.append(text)
+        if self.speech_delay:
+            await asyncio.sleep(self.speech_delay * len(text))
+
+    async def listen_async(self):
+        return self.replies.pop(0).lower() if self.replies else ""
+
+    def next_voice(self):
+        self.actions.append(["next_voice"])
+
+    def open_url(self, url):
+        self.actions.append(["open_url", url])
+
+    def play_on_youtube(self, song):
+        self.actions.append(["play_on_youtube", song])
+
+    def screenshot(self, path):
+        self.actions.append(["screenshot"])
+
+    def system(self, command):
+        self.actions.append(["system", command])
+
+
+def read_commands(path):
+    commands = []
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            text = entry.get("text") or entry.get("utterance")
+            if not text:
+                raise ValueError(f"{path}:{number}: no 'text' or 'utterance' field")
+            commands.append(dict(entry, id=entry.get("id", number), text=text))
+    return commands
+
+
+async def run_batch(commands, make_engine, parallel=4, speech_delay=0.0):
+    """Runs commands through fresh engines, at most parallel at once, and returns one result per command in order."""
+    semaphore = asyncio.Semaphore(parallel)
+
+    async def run_one(command):
+        frontend = BatchFrontEnd(speech_delay, command.get("replies", ()))
+        engine = make_engine(frontend)
+        request = command["text"].lower()
+        result = {"id": command["id"], "text": command["text"], "intent": intents.route(request)}
+        if "intent" in command:
+            result["expected_intent"] = command["intent"]
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await engine.process(request)
+                result["error"] = None
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+            result["latency"] = time.perf_counter() - start
+        result["responses"] = frontend.responses
+        result["actions"] = frontend.actions
+        return result
+
+    return await asyncio.gather(*(run_one(command) for command in commands))
+
+
+async def batch_main(args):
+    from chat_history import ManagedChat
+    from data_cache import DataCache
+    from fakes import FakeModel, FakeServices, Latency
+    from http_client import HttpClient
+
+    commands = read_commands(args.commands)
+    workdir = tempfile.mkdtemp(prefix="dex-batch-")
+    http = HttpClient()
+    data_cache = DataCache(path=os.path.join(workdir, "data_cache.json"))
+    todo_file = os.path.join(workdir, "todo.txt")
+    if args.live:
+        services_backend = None
+        loop = asyncio.get_running_loop()
+        chat_session = await loop.run_in_executor(None, ai.initialize_chat)
+    else:
+        services_backend = FakeServices(Latency(args.service_latency), Latency(args.service_latency),
+                                        Latency(args.service_latency))
+        chat_session = ManagedChat(FakeModel(Latency(args.llm_latency), Latency(args.llm_latency / 10)))
+
+    def make_engine(frontend):
+        return CommandEngine(frontend, http, data_cache, home_city="London", chat_session=chat_session,
+                             services_backend=services_backend, todo_file=todo_file)
+
+    start = time.perf_counter()
+    try:
+        results = await run_batch(commands, make_engine, args.parallel, args.speech_delay)
+    finally:
+        await http.close()
+    elapsed = time.perf_counter() - start
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+
+    latencies = sorted(result["latency"] for result in results)
+    mismatches = [r for r in results if "expected_intent" in r and r["expected_intent"] != r["intent"]]
+    errors = [r for r in results if r["error"]]
+    print(f"{len(results)} commands in {elapsed:.2f}s ({len(results) / elapsed:.1f}/s, parallel {args.parallel})")
+    if latencies:
+        print(f"latency p50 {latencies[len(latencies) // 2] * 1000:.0f}ms, "
+              f"p95 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000:.0f}ms, "
+              f"max {latencies[-1] * 1000:.0f}ms")
+    for r in mismatches:
+        print(f"🔴 #{r['id']} '{r['text']}': routed to {r['intent']}, expected {r['expected_intent']}")
+    for r in errors:
+        print(f"🔴 #{r['id']} '{r['text']}': {r['error']}")
+    print(f"Results written to {args.out}")
+    return 1 if mismatches or errors else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay text commands through the command engine without a microphone or speakers.")
+    parser.add_argument("commands", help="JSONL file of commands")
+    parser.add_argument("--out", default="results.jsonl", help="JSONL file for responses and timings")
+    parser.add_argument("--parallel", type=int, default=4, help="commands in flight at once")
+    parser.add_argument("--live", action="store_true", help="use Gemini and the real web services instead of local stand-ins")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="stand-in Gemini delay before the first chunk, seconds")
+    parser.add_argument("--service-latency", type=float, default=0.1, help="stand-in weather/news/Wikipedia delay, seconds")
+    parser.add_argument("--speech-delay", type=float, default=0.0, help="simulated synthesis time per spoken character, seconds")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(batch_main(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import asyncio
+import os
+import random
+import threading
+import time
+
+# --- Local Stand-ins ---
+# Deterministic replacements for the external services, for batch runs and
+# benchmarks on a machine with no keys, network, microphone or speakers.
+
+
+class Latency:
+    """
+    A delay distribution: log-normal around median seconds with spread
+    sigma, plus an optional rare stall. Seeded, so runs repeat.
+    """
+
+    def __init__(self, median=0.0, sigma=0.0, stall=0.0, stall_rate=0.0, seed=0):
+        self.median = median
+        self.sigma = sigma
+        self.stall = stall
+        self.stall_rate = stall_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()  # samples are drawn from several threads
+
+    def sample(self):
+        with self.lock:
+            delay = self.median * self.random.lognormvariate(0, self.sigma) if self.sigma else self.median
+            if self.stall_rate and self.random.random() < self.stall_rate:
+                delay += self.stall
+        return delay
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel. Replies are a fixed function of the prompt."""
+
+    def __init__(self, latency=None, chunk_latency=None, reply_sentences=3):
+        self.latency = latency or Latency()
+        self.chunk_latency = chunk_latency or Latency()
+        self.reply_sentences = reply_sentences
+
+    def reply(self, contents):
+        prompt = contents if isinstance(contents, str) else " ".join(contents[-1]["parts"])
+        if "source.unsplash.com" in prompt:  # the image generator asks for a URL
+            return "https://source.unsplash.com/1920x1080/?fox,forest"
+        topic = " ".join(prompt.split()[:6])
+        return " ".join(f"Sentence {i + 1} about {topic}." for i in range(self.reply_sentences))
+
+    def generate_content(self, contents, stream=False):
+        time.sleep(self.latency.sample())
+        text = self.reply(contents)
+        if not stream:
+            return FakeResponse(text)
+
+        def chunks():
+            words = text.split(" ")
+            for start in range(0, len(words), 4):
+                if start:
+                    time.sleep(self.chunk_latency.sample())
+                yield FakeResponse(" ".join(words[start:start + 4]) + " ")
+        return chunks()
+
+
+class FakeServices:
+    """Stands in for the services module: OpenWeatherMap, NewsAPI and Wikipedia."""
+
+    def __init__(self, weather_latency=None, news_latency=None, wikipedia_latency=None):
+        self.weather_latency = weather_latency or Latency()
+        self.news_latency = news_latency or Latency()
+        self.wikipedia_latency = wikipedia_latency or Latency()
+
+    async def fetch_weather(self, http, city):
+        await asyncio.sleep(self.weather_latency.sample())
+        if city.lower() in ("atlantis", "nowhere"):
+            return {"cod": "404", "message": "city not found"}
+        return {"cod": 200, "main": {"temp": 20 + len(city) % 10}, "weather": [{"description": "clear sky"}]}
+
+    async def fetch_headlines(self, http, country="in"):
+        await asyncio.sleep(self.news_latency.sample())
+        return [f"Headline {i + 1} from {country.upper()}" for i in range(5)]
+
+    async def fetch_wikipedia(self, query, sentences=2):
+        await asyncio.sleep(self.wikipedia_latency.sample())
+        return " ".join(f"{query.capitalize()} fact {i + 1}." for i in range(sentences))
+
+    async def download_image(self, http, url, path):
+        await asyncio.sleep(self.news_latency.sample())
+
+
+# Edge TTS output is 48 kbit/s, 24 kHz mono MP3; speech runs about 15
+# characters a second. FAKE_FRAME is one silent frame of that format (24 ms),
+# so fake speech decodes like the real thing.
+AUDIO_BYTES_PER_SECOND = 6000
+SPOKEN_CHARS_PER_SECOND = 15
+FAKE_FRAME = b"\xff\xf3\x64\xc4" + bytes(140)
+
+
+def audio_duration(data):
+    """Seconds of speech in MP3 bytes made by FakeCommunicate."""
+    return len(data) / AUDIO_BYTES_PER_SECOND
+
+
+class FakeCommunicate:
+    """
+    Stands in for edge_tts.Communicate: a first-chunk delay, then MP3-looking
+    frames arriving in real time, as much audio as the text would take to say.
+    """
+
+    def __init__(self, text, voice=None, first_chunk_latency=None, chunk_latency=None):
+        seconds = max(len(text), 1) / SPOKEN_CHARS_PER_SECOND
+        self.frames = max(1, int(seconds * AUDIO_BYTES_PER_SECOND) // len(FAKE_FRAME))
+        self.first_chunk_latency = first_chunk_latency or Latency()
+        self.chunk_latency = chunk_latency or Latency()
+
+    async def stream(self):
+        await asyncio.sleep(self.first_chunk_latency.sample())
+        # Edge TTS sends a few frames per message.
+        for start in range(0, self.frames, 8):
+            if start:
+                await asyncio.sleep(self.chunk_latency.sample())
+            yield {"type": "audio", "data": FAKE_FRAME * min(8, self.frames - start)}
+
+
+class FakeAudio:
+    """What FakeMicrophone hands to the recognizer: the words that were "said"."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeMicrophone:
+    """
+    Stands in for mic.MicrophoneStream. Each utterance takes as long as it
+    would to say, plus the end-of-speech pause, divided by speed; then any
+    extra latency.
+    """
+
+    def __init__(self, utterances=(), latency=None, pause=0.7, speed=1.0):
+        self.utterances = list(utterances)
+        self.latency = latency or Latency()
+        self.pause = pause
+        self.speed = speed
+        self.closed = False
+
+    def say(self, text):
+        self.utterances.append(text)
+
+    def start(self):
+        pass
+
+    def drain(self):
+        pass
+
+    def next_utterance(self, timeout=None, cancelled=None):
+        if not self.utterances or (cancelled is not None and cancelled.is_set()):
+            return None
+        text = self.utterances.pop(0)
+        time.sleep((len(text) / SPOKEN_CHARS_PER_SECOND + self.pause) / self.speed + self.latency.sample())
+        return FakeAudio(text)
+
+    def interrupt(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeRecognizer:
+    """Stands in for recognizers.RecognizerRace: returns what was said after a delay."""
+
+    def __init__(self, latency=None):
+        self.latency = latency or Latency()
+
+    def recognize(self, audio):
+        time.sleep(self.latency.sample())
+        return FakeResponse(audio.text)
+
+    def close(self):
+        pass
+
+
+# --- Worker With Stand-ins ---
+def install_fakes(workdir, sink, communicate, microphone, recognizer, model, fast_model=None, output="memory",
+                  player=None, player_command=None):
+    """
+    Builds an app.AssistantWorker that talks to the stand-ins above instead
+    of the outside world, for the benchmarks. Its caches start empty in
+    workdir rather than ~/.dex, and background prefetching, warm-up and
+    the Gemini response cache are off.
+
+    communicate(text, voice) replaces edge_tts.Communicate. Speech plays
+    through an audio_out.AudioOutput writing to sink, or with
+    output="pipe" through player(command), which stands in for
+    tts.PipePlayer and is started with player_command. Gemini is model,
+    with fast_model for the quick tier (model if not given).
+    """
+    os.environ.update(DEX_DATA_CACHE=os.path.join(workdir, "data_cache.json"), DEX_TTS_CACHE_DIR=os.path.join(workdir, "tts"),
+                      DEX_PREFETCH="0", DEX_CHAT_CACHE="0", DEX_WARMUP="0")
+
+    import tts
+    from audio_out import AudioOutput
+    tts.AUDIO_OUTPUT = output
+    tts.set_output(AudioOutput(sink))
+    tts.new_communicate = communicate
+    if player is not None:
+        tts.find_stream_player = lambda: player_command
+        tts.PipePlayer = player
+
+    from app import AssistantWorker
+    from chat_history import ManagedChat
+    from gemini_client import TieredModel
+
+    worker = AssistantWorker()
+    worker.mic = microphone
+    worker.stt = recognizer
+    worker.engine.chat_session = ManagedChat(TieredModel({"default": model, "fast": fast_model or model}))
+    worker.chat_ready = True
+    worker.start_chat = lambda: None
+    return worker
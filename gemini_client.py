@@ -0,0 +1,228 @@
+import bisect
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_MODEL = os.environ.get("DEX_GEMINI_MODEL", "gemini-1.5-flash")
+FAST_MODEL = os.environ.get("DEX_GEMINI_FAST_MODEL", "gemini-1.5-flash-8b")
+# Upper bounds of the latency histogram buckets, in seconds.
+LATENCY_BUCKETS = [0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0, float("inf")]
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MIN_HEDGE_SAMPLES = 20  # below this the percentile is a guess, so hedge_after is used
+
+# Prompts asking for any of these go to the default tier whatever their length.
+COMPLEX_WORDS = {
+    "explain", "why", "how", "write", "code", "compare", "difference", "analyze", "analyse",
+    "summarize", "summarise", "plan", "steps", "essay", "story", "poem", "translate", "detail",
+}
+FAST_MAX_WORDS = 12
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with bucket-resolution percentiles."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile, or None with no samples."""
+        if not self.count:
+            return None
+        rank = self.count * q / 100
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": {str(bound): count for bound, count in zip(self.buckets, self.counts)},
+        }
+
+
+class TierStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.errors = 0
+
+
+def prompt_text(contents):
+    """The newest user text in a generate_content request."""
+    if isinstance(contents, str):
+        return contents
+    last = contents[-1]
+    return " ".join(str(part) for part in last["parts"]) if isinstance(last, dict) else str(last)
+
+
+def is_simple(prompt):
+    """Short prompts that ask for nothing elaborate can be answered by the fast tier."""
+    words = re.findall(r"[a-z']+", prompt.lower())
+    return len(words) <= FAST_MAX_WORDS and not COMPLEX_WORDS.intersection(words)
+
+
+def retryable(error):
+    return isinstance(error, (TimeoutError, ConnectionError)) or getattr(error, "code", None) in RETRY_STATUSES
+
+
+class TieredModel:
+    """
+    Wraps Gemini models with a deadline, hedged requests and retries, and
+    sends short simple prompts to a faster tier. It has the
+    generate_content method of genai.GenerativeModel, so ManagedChat (or
+    anything else) can use it in place of one model; tiers can be any
+    objects with that method, such as a local fake that injects delays.
+
+    Each call must finish within deadline seconds, retries included. If
+    the first request has not answered by the tier's hedge_percentile
+    latency (hedge_after until enough samples exist), one duplicate is sent
+    and whichever answers first wins. Timeouts, connection errors and
+    429/5xx responses are retried with jittered exponential backoff. For
+    streams the deadline and hedge apply to the first chunk.
+    """
+
+    def __init__(self, tiers, fast_tier="fast", default_tier="default", deadline=None, hedge_percentile=None,
+                 hedge_after=2.0, retries=None, backoff=0.5):
+        self.tiers = tiers
+        self.fast_tier = fast_tier if fast_tier in tiers else default_tier
+        self.default_tier = default_tier
+        self.deadline = deadline if deadline is not None else float(os.environ.get("DEX_GEMINI_DEADLINE", "20"))
+        if hedge_percentile is None:
+            hedge_percentile = float(os.environ.get("DEX_GEMINI_HEDGE_PERCENTILE", "95"))
+        self.hedge_percentile = hedge_percentile  # 0 turns hedging off
+        self.hedge_after = hedge_after
+        self.retries = retries if retries is not None else int(os.environ.get("DEX_GEMINI_RETRIES", "2"))
+        self.backoff = backoff
+        self.stats_by_tier = {name: TierStats() for name in tiers}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="dex-gemini")
+
+    def choose_tier(self, contents):
+        return self.fast_tier if is_simple(prompt_text(contents)) else self.default_tier
+
+    def hedge_delay(self, tier):
+        if not self.hedge_percentile:
+            return None
+        histogram = self.stats_by_tier[tier].latency
+        if histogram.count < MIN_HEDGE_SAMPLES:
+            return self.hedge_after
+        return histogram.percentile(self.hedge_percentile)
+
+    def generate_content(self, contents, stream=False, tier=None):
+        tier = tier or self.choose_tier(contents)
+        model = self.tiers[tier]
+        stats = self.stats_by_tier[tier]
+        with self.lock:
+            stats.requests += 1
+
+        if stream:
+            def call():
+                chunks = iter(model.generate_content(contents, stream=True))
+                # The first chunk is the slow part; waiting for it here lets the hedge cover it.
+                first = next(chunks, None)
+                return first, chunks
+            first, chunks = self._call_with_deadline(call, tier)
+            return self._stream(first, chunks)
+        return self._call_with_deadline(lambda: model.generate_content(contents), tier)
+
+    @staticmethod
+    def _stream(first, chunks):
+        if first is not None:
+            yield first
+        yield from chunks
+
+    def _call_with_deadline(self, call, tier):
+        stats = self.stats_by_tier[tier]
+        deadline_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            try:
+                return self._attempt(call, tier, deadline_at)
+            except Exception as e:
+                timed_out = isinstance(e, TimeoutError)
+                remaining = deadline_at - time.monotonic()
+                delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                if attempt >= self.retries or not retryable(e) or remaining <= delay:
+                    with self.lock:
+                        if timed_out:
+                            stats.timeouts += 1
+                        else:
+                            stats.errors += 1
+                    raise
+                attempt += 1
+                with self.lock:
+                    stats.retries += 1
+                time.sleep(delay)
+
+    def _attempt(self, call, tier, deadline_at):
+        stats = self.stats_by_tier[tier]
+        start = time.monotonic()
+        first = self.executor.submit(call)
+        pending = {first}
+        hedge_delay = self.hedge_delay(tier)
+        if hedge_delay is not None and hedge_delay < deadline_at - start:
+            if not wait(pending, timeout=hedge_delay).done:
+                pending.add(self.executor.submit(call))
+                with self.lock:
+                    stats.hedges += 1
+
+        error = None
+        while pending:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                with self.lock:
+                    stats.latency.observe(time.monotonic() - start)
+                    if future is not first:
+                        stats.hedge_wins += 1
+                for other in pending:
+                    other.cancel()
+                return result
+        if pending:
+            # The threads cannot be stopped; their results are simply dropped.
+            for future in pending:
+                future.cancel()
+            raise TimeoutError(f"Gemini did not answer within {self.deadline:g} seconds")
+        raise error
+
+    def stats(self):
+        """Latency histogram and counters per tier, for tuning the deadline and hedge threshold."""
+        with self.lock:
+            return {
+                name: dict(stats.latency.snapshot(), requests=stats.requests, hedges=stats.hedges,
+                           hedge_wins=stats.hedge_wins, retries=stats.retries, timeouts=stats.timeouts,
+                           errors=stats.errors)
+                for name, stats in self.stats_by_tier.items()
+            }
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
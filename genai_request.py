@@ -1,15 +1,32 @@
-import google.generativeai as genai
+import asyncio
+import re
+import threading
+import time
 import os
 from dotenv import load_dotenv
 
+from chat_cache import ResponseCache
+from chat_history import ManagedChat
+from gemini_client import DEFAULT_MODEL, FAST_MODEL, TieredModel
+import tracing
+
 # Load environment variables from a .env file
 load_dotenv()
 
+# A sentence ends at ., ! or ? followed by whitespace.
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+# Replies to repeated context-free prompts; opt in with DEX_CHAT_CACHE=1.
+response_cache = ResponseCache()
+
 def initialize_chat():
     """
     Initializes the Gemini model and starts a new chat session.
     It securely reads the API key from environment variables.
     """
+    # Imported here rather than at the top: it takes a second or more to load.
+    import google.generativeai as genai
+
     try:
         # Correctly configure the API key from the environment variable
         api_key = os.environ.get("GOOGLE_API_KEY")
@@ -23,11 +40,16 @@ def initialize_chat():
         print("Please make sure a .env file with your GOOGLE_API_KEY is present.")
         return None
 
-    # Use a valid and current model name. 'gemini-1.5-flash' is fast and efficient.
-    model = genai.GenerativeModel('gemini-1.5-flash')
+    # 'gemini-1.5-flash' answers most prompts; short simple ones go to the
+    # faster tier. Calls get a deadline, hedging and retries.
+    model = TieredModel({
+        "default": genai.GenerativeModel(DEFAULT_MODEL),
+        "fast": genai.GenerativeModel(FAST_MODEL),
+    })
 
-    # Start a new chat session. This object will remember the conversation.
-    chat = model.start_chat(history=[])
+    # Start a new chat session. It remembers the recent conversation and
+    # summarizes older turns so requests stay within a token budget.
+    chat = ManagedChat(model)
     print("🤖 AI Chat Session Initialized.")
     return chat
 
@@ -38,11 +60,121 @@ def send_chat_message(chat_session, prompt):
     if not chat_session:
         return "Chat session is not initialized. Please check your API key."
     
+    cached = response_cache.get(prompt)
+    if cached is not None:
+        # Keep the turn in the history so follow-up questions still make sense.
+        chat_session.record(prompt, cached)
+        return cached
+
     try:
         print(f"Sending to Gemini: '{prompt}'")
+        start = time.perf_counter()
         # The history is automatically handled by the chat_session object.
-        response = chat_session.send_message(prompt)
+        with tracing.span("gemini"):
+            response = chat_session.send_message(prompt)
+        response_cache.put(prompt, response.text, time.perf_counter() - start)
         return response.text
+    except TimeoutError as e:
+        print(f"🔴 {e}")
+        return "Sorry, the AI is taking too long to answer. Please try again."
     except Exception as e:
         print(f"🔴 An error occurred while sending the message: {e}")
-        return "Sorry, I encountered an error communicating with the AI."
\ No newline at end of file
+        return "Sorry, I encountered an error communicating with the AI."
+
+def split_sentences(buffer):
+    """
+    Splits the complete sentences off the front of buffer.
+    Returns the sentences and the unfinished remainder.
+    """
+    parts = SENTENCE_END.split(buffer)
+    sentences = [part.strip() for part in parts[:-1] if part.strip()]
+    return sentences, parts[-1]
+
+def stream_chat_message(chat_session, prompt, cancel=None):
+    """
+    Sends a message to the ongoing chat session and yields the response
+    sentence by sentence while Gemini is still generating it. Setting the
+    cancel event abandons the stream at the next chunk.
+    """
+    if not chat_session:
+        yield "Chat session is not initialized. Please check your API key."
+        return
+
+    cached = response_cache.get(prompt)
+    if cached is not None:
+        chat_session.record(prompt, cached)
+        sentences, rest = split_sentences(cached)
+        yield from sentences
+        if rest.strip():
+            yield rest.strip()
+        return
+
+    response = None
+    try:
+        print(f"Streaming from Gemini: '{prompt}'")
+        start = time.perf_counter()
+        response = chat_session.send_message(prompt, stream=True)
+        buffer = ""
+        parts = []
+        blocked = 0.0  # time the caller held us up, e.g. speaking the early sentences
+        for chunk in response:
+            if cancel is not None and cancel.is_set():
+                return
+            if not parts:
+                tracing.record("gemini.first_chunk", time.perf_counter() - start)
+            buffer += chunk.text
+            parts.append(chunk.text)
+            sentences, buffer = split_sentences(buffer)
+            for sentence in sentences:
+                paused = time.perf_counter()
+                yield sentence
+                blocked += time.perf_counter() - paused
+        generation = time.perf_counter() - start - blocked
+        if buffer.strip():
+            yield buffer.strip()
+        # Only the time Gemini took to generate the reply, not the time spent speaking it.
+        tracing.record("gemini", generation, stream=True)
+        response_cache.put(prompt, "".join(parts), generation)
+    except TimeoutError as e:
+        print(f"🔴 {e}")
+        yield "Sorry, the AI is taking too long to answer. Please try again."
+    except Exception as e:
+        print(f"🔴 An error occurred while streaming the message: {e}")
+        yield "Sorry, I encountered an error communicating with the AI."
+    finally:
+        # The session only records the turn in its history once the stream
+        # has been read to the end, so drain it if the caller stopped early,
+        # unless the user cut the reply off.
+        if response is not None and not (cancel is not None and cancel.is_set()):
+            try:
+                response.resolve()
+            except Exception:
+                pass
+
+async def astream_chat_message(chat_session, prompt):
+    """
+    Async version of stream_chat_message. The blocking Gemini stream is read
+    in a worker thread so the event loop stays free for speech.
+    """
+    loop = asyncio.get_running_loop()
+    cancel = threading.Event()
+    sentences = stream_chat_message(chat_session, prompt, cancel)
+    done = object()
+    try:
+        while True:
+            sentence = await loop.run_in_executor(None, next, sentences, done)
+            if sentence is done:
+                break
+            yield sentence
+    except (asyncio.CancelledError, GeneratorExit):
+        # Barge-in: the worker thread stops reading Gemini after its current
+        # chunk. A consumer cancelled between sentences closes this generator
+        # at its yield instead, which is the same thing.
+        cancel.set()
+        raise
+    finally:
+        try:
+            sentences.close()
+        except ValueError:
+            # Still running in the worker thread; it finishes on its own.
+            pass
\ No newline at end of file
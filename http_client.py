@@ -0,0 +1,73 @@
+import asyncio
+from urllib.parse import urlsplit
+
+import aiohttp
+
+# Raised (or subclassed) by every failed request, after retries run out.
+HttpError = aiohttp.ClientError
+
+DEFAULT_TIMEOUT = 10  # seconds, for hosts without their own entry below
+HOST_TIMEOUTS = {
+    "api.openweathermap.org": 5,
+    "newsapi.org": 8,
+}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HttpClient:
+    """
+    Shared async HTTP client. One aiohttp session pools keep-alive
+    connections for every caller, each host has its own timeout, and
+    connection errors, timeouts and 429/5xx replies are retried a bounded
+    number of times with exponential backoff.
+    """
+
+    def __init__(self, host_timeouts=None, default_timeout=DEFAULT_TIMEOUT, retries=2, backoff=0.3, limit=20, keepalive=30):
+        self.host_timeouts = dict(HOST_TIMEOUTS, **(host_timeouts or {}))
+        self.default_timeout = default_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.limit = limit
+        self.keepalive = keepalive
+        self.session = None
+
+    def _session(self):
+        # Created lazily so the session belongs to the loop that first uses it.
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, keepalive_timeout=self.keepalive)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    def timeout_for(self, url):
+        host = urlsplit(url).hostname
+        return aiohttp.ClientTimeout(total=self.host_timeouts.get(host, self.default_timeout))
+
+    async def _request(self, url, params, read):
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                async with self._session().get(url, params=params, timeout=self.timeout_for(url)) as response:
+                    if response.status not in RETRY_STATUSES or last_attempt:
+                        return await read(response)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if last_attempt:
+                    raise HttpError(f"GET {urlsplit(url).hostname} failed: {e!r}") from e
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def get_json(self, url, params=None):
+        """GETs url and returns the decoded JSON body, whatever the status code."""
+        return await self._request(url, params, lambda response: response.json(content_type=None))
+
+    async def download(self, url, path, chunk_size=64 * 1024):
+        """Streams url into the file at path. Raises HttpError on a bad status."""
+        async def save(response):
+            response.raise_for_status()
+            with open(path, "wb") as f:
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    f.write(chunk)
+            return path
+        return await self._request(url, None, save)
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
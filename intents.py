@@ -0,0 +1,98 @@
+import re
+from collections import deque, namedtuple
+
+# --- Intent Registry ---
+# Shared by app.py and main.py. Phrases only match on whole words, and when
+# several intents match the highest priority wins, then the earliest phrase.
+Intent = namedtuple("Intent", ["name", "phrases", "priority"])
+Match = namedtuple("Match", ["intent", "start", "end"])
+
+INTENTS = [
+    Intent("shutdown", ["shutdown the system", "shut down the system"], 100),
+    Intent("restart", ["restart the system"], 100),
+    Intent("search_google", ["search google for"], 90),
+    Intent("wikipedia", ["wikipedia"], 85),
+    Intent("generate_image", ["generate image", "generate an image"], 80),
+    Intent("change_voice", ["change your voice"], 80),
+    Intent("open_youtube", ["open youtube"], 75),
+    Intent("screenshot", ["take a screenshot"], 75),
+    Intent("play_music", ["play music"], 70),
+    Intent("play", ["play"], 65),
+    Intent("weather", ["weather"], 60),
+    Intent("news", ["news"], 55),
+    Intent("todo", ["to-do list", "to do list", "todo list", "task", "tasks", "new task"], 50),
+    Intent("time", ["time"], 40),
+    Intent("date", ["date"], 40),
+    Intent("goodbye", ["goodbye", "exit", "quit"], 30),
+    Intent("hello", ["hello"], 20),
+]
+
+TOKEN = re.compile(r"[\w'-]+")
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+class IntentMatcher:
+    """
+    Aho-Corasick automaton over word tokens. Every phrase of every intent is
+    found in a single left-to-right pass over the utterance.
+    """
+
+    def __init__(self, intents):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for intent in intents:
+            for phrase in intent.phrases:
+                self._add(tokenize(phrase), intent)
+        self._link()
+
+    def _add(self, tokens, intent):
+        node = 0
+        for token in tokens:
+            if token not in self.goto[node]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[node][token] = len(self.goto) - 1
+            node = self.goto[node][token]
+        self.output[node].append((intent, len(tokens)))
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(token, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def match(self, text):
+        """Returns the best Match in text, or None if no intent phrase occurs."""
+        best = None
+        node = 0
+        for position, token in enumerate(tokenize(text)):
+            while node and token not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(token, 0)
+            for intent, length in self.output[node]:
+                start = position - length + 1
+                if best is None or intent.priority > best.intent.priority or (
+                    intent.priority == best.intent.priority and start < best.start
+                ):
+                    best = Match(intent, start, position + 1)
+        return best
+
+
+matcher = IntentMatcher(INTENTS)
+
+
+def route(request):
+    """Returns the name of the intent for request, or None for general chat."""
+    match = matcher.match(request)
+    return match.intent.name if match else None
@@ -0,0 +1,168 @@
+import audioop
+import collections
+import math
+import threading
+
+import speech_recognition as sr
+
+
+class MicrophoneStream:
+    """
+    Keeps one audio source open and reads it on a background thread. The
+    energy threshold is calibrated once and then follows the background
+    noise continuously, and finished utterances are handed out from a small
+    ring buffer, so listening never has to reopen or recalibrate the device.
+
+    With use_vad=True speech is detected by vad.VoiceActivityDetector
+    instead of a single energy threshold. Any speech_recognition source
+    works, so sr.AudioFile("clip.wav") can stand in for the microphone.
+    """
+
+    def __init__(self, source=None, pause_threshold=0.7, phrase_threshold=0.3, non_speaking_duration=0.5,
+                 energy_threshold=300, calibration_duration=1.0, damping=0.15, ratio=1.5, max_utterances=4,
+                 use_vad=False):
+        self.source = source
+        self.use_vad = use_vad
+        self.pause_threshold = pause_threshold
+        self.phrase_threshold = phrase_threshold
+        self.non_speaking_duration = non_speaking_duration
+        self.energy_threshold = energy_threshold
+        self.calibration_duration = calibration_duration
+        self.damping = damping
+        self.ratio = ratio
+        self.utterances = collections.deque(maxlen=max_utterances)
+        self.ready = threading.Condition()
+        self.thread = None
+        self.closed = False
+
+    def start(self):
+        """Opens the source and starts capturing. Does nothing if already running."""
+        if self.thread is not None:
+            return
+        if self.source is None:
+            self.source = sr.Microphone()
+        self.source.__enter__()
+        self.thread = threading.Thread(target=self._capture, name="dex-mic", daemon=True)
+        self.thread.start()
+
+    def close(self):
+        """Stops capturing; next_utterance() returns None from now on. Safe from any thread, and more than once."""
+        with self.ready:
+            self.closed = True
+            self.ready.notify_all()
+            thread, self.thread = self.thread, None
+        if thread is not None:
+            thread.join(timeout=1)
+            self.source.__exit__(None, None, None)
+
+    def drain(self):
+        """Forgets utterances captured before now."""
+        with self.ready:
+            self.utterances.clear()
+
+    def next_utterance(self, timeout=None, cancelled=None):
+        """
+        Blocks until an utterance is available and returns it as
+        sr.AudioData, or None on timeout, close, or once the threading.Event
+        cancelled is set and interrupt() called. A cancelled wait leaves the
+        utterance for the next caller.
+        """
+        with self.ready:
+            is_cancelled = cancelled.is_set if cancelled is not None else lambda: False
+            self.ready.wait_for(lambda: self.utterances or self.closed or is_cancelled(), timeout)
+            return self.utterances.popleft() if self.utterances and not is_cancelled() else None
+
+    def interrupt(self):
+        """Wakes every waiting next_utterance() so it checks its cancelled event. Safe from any thread."""
+        with self.ready:
+            self.ready.notify_all()
+
+    def _publish(self, frames):
+        with self.ready:
+            self.utterances.append(sr.AudioData(b"".join(frames), self.source.SAMPLE_RATE, self.source.SAMPLE_WIDTH))
+            self.ready.notify_all()
+
+    def _capture(self):
+        source = self.source
+        seconds_per_buffer = source.CHUNK / source.SAMPLE_RATE
+        pause_buffers = int(math.ceil(self.pause_threshold / seconds_per_buffer))
+        phrase_buffers = int(math.ceil(self.phrase_threshold / seconds_per_buffer))
+        preroll_buffers = int(math.ceil(self.non_speaking_duration / seconds_per_buffer))
+        calibration_buffers = int(math.ceil(self.calibration_duration / seconds_per_buffer))
+        damping = self.damping ** seconds_per_buffer
+
+        preroll = collections.deque(maxlen=preroll_buffers)
+        phrase = None
+        pause_count = 0
+        calibration = []
+        detector = None
+        if self.use_vad:
+            from vad import VoiceActivityDetector
+            detector = VoiceActivityDetector(source.SAMPLE_RATE)
+
+        while not self.closed:
+            buffer = source.stream.read(source.CHUNK)
+            if not buffer:
+                break
+
+            if detector is not None:
+                speaking = detector.is_speech(buffer, source.SAMPLE_WIDTH)
+            else:
+                energy = audioop.rms(buffer, source.SAMPLE_WIDTH)
+                if len(calibration) < calibration_buffers:
+                    # Like Recognizer.adjust_for_ambient_noise, but only once per stream.
+                    calibration.append(energy)
+                    self.energy_threshold = sum(calibration) / len(calibration) * self.ratio
+                    preroll.append(buffer)
+                    continue
+                speaking = energy > self.energy_threshold
+                if phrase is None and not speaking:
+                    # Follow the background noise while nobody is speaking.
+                    target = energy * self.ratio
+                    self.energy_threshold = self.energy_threshold * damping + target * (1 - damping)
+
+            if phrase is None:
+                if speaking:
+                    phrase = list(preroll)
+                    phrase.append(buffer)
+                    pause_count = 0
+                else:
+                    preroll.append(buffer)
+                continue
+
+            phrase.append(buffer)
+            pause_count = 0 if speaking else pause_count + 1
+            if pause_count > pause_buffers:
+                if len(phrase) - pause_count - len(preroll) >= phrase_buffers:
+                    self._publish(phrase)
+                phrase = None
+                preroll.clear()
+
+        if phrase and len(phrase) - pause_count - len(preroll) >= phrase_buffers:
+            self._publish(phrase)
+        with self.ready:
+            self.closed = True
+            self.ready.notify_all()
+
+
+# --- Wake Phrase ---
+def heard_wake_phrase(recognizer, audio, phrase):
+    """
+    Spots the wake phrase locally with PocketSphinx keyword search.
+    Returns True or False, or None if PocketSphinx is not installed.
+    """
+    try:
+        recognizer.recognize_sphinx(audio, keyword_entries=[(phrase, 1e-20)])
+        return True
+    except sr.UnknownValueError:
+        return False
+    except sr.RequestError:
+        return None
+
+
+def strip_wake_phrase(text, phrase):
+    """Returns the command after the wake phrase, or None if text does not contain it."""
+    index = text.lower().find(phrase.lower())
+    if index < 0:
+        return None
+    return text[index + len(phrase):].strip(" ,.!?")
@@ -0,0 +1,109 @@
+import os
+
+from PyQt5.QtCore import QObject, QSize, Qt, QTimer
+from PyQt5.QtGui import QImageReader, QPixmap
+
+IDLE_FPS = float(os.environ.get("DEX_ORB_IDLE_FPS", "10"))
+DEFAULT_DELAY = 100  # ms, for frames that do not say
+
+# (absolute path, width, height) -> [(QPixmap, delay in ms)], shared by every animator.
+FRAME_CACHE = {}
+
+
+def load_frames(path, size):
+    """
+    Decodes every frame of an animated image once, scaled to size, and
+    caches the result. Returns [] if the file cannot be read.
+    """
+    key = (os.path.abspath(path), size.width(), size.height())
+    frames = FRAME_CACHE.get(key)
+    if frames is not None:
+        return frames
+    reader = QImageReader(path)
+    frames = []
+    while True:
+        image = reader.read()
+        if image.isNull():
+            break
+        delay = reader.nextImageDelay() or DEFAULT_DELAY
+        scaled = image.scaled(size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        frames.append((QPixmap.fromImage(scaled), delay))
+    if not frames:
+        print(f"🔴 Could not load animation {path}: {reader.errorString()}")
+    FRAME_CACHE[key] = frames
+    return frames
+
+
+class OrbAnimator(QObject):
+    """
+    Plays the orb animations on a QLabel from pre-scaled frames. One timer
+    drives whichever state is showing, so the other animations cost
+    nothing; it stops while the orb is hidden or the window minimized, and
+    in the idle state the orb repaints at most idle_fps times a second,
+    skipping frames to keep the animation's speed.
+    """
+
+    def __init__(self, label, states, size=QSize(200, 200), idle_state="idle", idle_fps=IDLE_FPS, parent=None):
+        super().__init__(parent or label)
+        self.label = label
+        self.states = states  # state name -> animated image path
+        self.size = size
+        self.idle_state = idle_state
+        self.idle_fps = idle_fps
+        self.state = None
+        self.frames = []
+        self.index = 0
+        self.next_index = 0
+        self.visible = True
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.next_frame)
+
+    def set_state(self, state):
+        """Switches animation. Setting the state that is already playing does not restart it."""
+        if state == self.state:
+            return
+        self.state = state
+        self.frames = load_frames(self.states[state], self.size)
+        self.index = 0
+        self.show_frame()
+        self.schedule()
+
+    def preload(self):
+        """Decodes every state's frames now instead of on its first use."""
+        for path in self.states.values():
+            load_frames(path, self.size)
+
+    def set_visible(self, visible):
+        self.visible = visible
+        if visible:
+            self.show_frame()
+            self.schedule()
+        else:
+            self.timer.stop()
+
+    def show_frame(self):
+        if self.frames:
+            self.label.setPixmap(self.frames[self.index][0])
+
+    def schedule(self):
+        if not self.visible or len(self.frames) < 2:
+            self.timer.stop()
+            return
+        throttled = self.state == self.idle_state and self.idle_fps
+        min_interval = 1000 / self.idle_fps if throttled else 0
+        # Skip ahead until enough animation time has passed for one repaint.
+        delay, index = 0, self.index
+        while True:
+            delay += self.frames[index][1]
+            index = (index + 1) % len(self.frames)
+            if delay >= min_interval or index == self.index:
+                break
+        self.next_index = index
+        self.timer.setTimerType(Qt.CoarseTimer if throttled else Qt.PreciseTimer)
+        self.timer.start(int(delay))
+
+    def next_frame(self):
+        self.index = self.next_index
+        self.show_frame()
+        self.schedule()
@@ -0,0 +1,98 @@
+import asyncio
+import datetime
+import os
+import random
+import time
+
+import services
+
+NEWS_INTERVAL, NEWS_DAILY_BUDGET = 20 * 60, 60  # NewsAPI's free tier allows 100 requests a day
+WEATHER_INTERVAL, WEATHER_DAILY_BUDGET = 10 * 60, 150
+MAX_BACKOFF = 60 * 60  # seconds
+RETRY_AFTER = 60  # first retry delay after a failure, doubled per failure
+
+
+class PrefetchJob:
+    def __init__(self, source, key, fetch, interval, daily_budget):
+        self.source = source
+        self.key = key
+        self.fetch = fetch
+        self.interval = interval
+        self.daily_budget = daily_budget
+        self.next_run = 0.0
+        self.failures = 0
+        self.used_today = 0
+        self.day = datetime.date.today()
+        self.disabled = False
+
+
+class PrefetchScheduler:
+    """
+    Periodically refreshes predictable lookups (top headlines, home-city
+    weather) into a DataCache so the matching commands answer without a
+    network wait. Failed jobs back off exponentially, and each job stops
+    for the day once it has used its daily request budget.
+    Set DEX_PREFETCH=0 to turn it off.
+    """
+
+    def __init__(self, cache, enabled=None):
+        self.cache = cache
+        if enabled is None:
+            enabled = os.environ.get("DEX_PREFETCH", "1") != "0"
+        self.enabled = enabled
+        self.jobs = []
+        self.task = None
+
+    def add(self, source, key, fetch, interval, daily_budget):
+        self.jobs.append(PrefetchJob(source, key, fetch, interval, daily_budget))
+
+    def start(self):
+        if self.enabled and self.jobs and self.task is None:
+            self.task = asyncio.ensure_future(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self):
+        while True:
+            now = time.time()
+            for job in self.jobs:
+                if not job.disabled and job.next_run <= now:
+                    await self.run_job(job)
+            active = [job.next_run for job in self.jobs if not job.disabled]
+            if not active:
+                return
+            await asyncio.sleep(max(1.0, min(active) - time.time()))
+
+    async def run_job(self, job):
+        today = datetime.date.today()
+        if job.day != today:
+            job.day, job.used_today = today, 0
+        if job.used_today >= job.daily_budget:
+            tomorrow = datetime.datetime.combine(today + datetime.timedelta(days=1), datetime.time())
+            job.next_run = tomorrow.timestamp()
+            return
+
+        job.used_today += 1
+        try:
+            value = await self.cache.refresh(job.source, job.key, job.fetch)
+        except Exception:
+            job.failures += 1
+            delay = min(RETRY_AFTER * 2 ** (job.failures - 1), MAX_BACKOFF)
+            job.next_run = time.time() + delay * random.uniform(0.8, 1.2)
+            return
+        if value is None:
+            # The service is not configured; there is nothing to prefetch.
+            job.disabled = True
+            return
+        job.failures = 0
+        job.next_run = time.time() + job.interval
+
+
+def schedule_common_lookups(scheduler, http, home_city=None):
+    """Adds the lookups both front ends prefetch: India's top headlines and the home city's weather."""
+    scheduler.add("news", "in", lambda: services.fetch_headlines(http), NEWS_INTERVAL, NEWS_DAILY_BUDGET)
+    if home_city:
+        scheduler.add("weather", home_city.lower(), lambda: services.fetch_weather(http, home_city), WEATHER_INTERVAL, WEATHER_DAILY_BUDGET)
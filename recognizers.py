@@ -0,0 +1,196 @@
+import importlib.util
+import math
+import os
+import socket
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import speech_recognition as sr
+
+Transcript = namedtuple("Transcript", ["text", "confidence", "backend"])
+
+
+# --- Recognition Backends ---
+class Backend:
+    """
+    One speech_recognition engine. transcribe() returns (text, confidence)
+    or raises sr.UnknownValueError / sr.RequestError like the engine does.
+    Engines that report no score use default_confidence, and max_confidence
+    is the most they can ever report.
+    """
+    name = ""
+    local = False
+    module = None  # import needed for the engine to run, if any
+    default_confidence = 1.0
+    max_confidence = 1.0
+
+    def __init__(self, recognizer=None):
+        self.recognizer = recognizer or sr.Recognizer()
+
+    @classmethod
+    def installed(cls):
+        return cls.module is None or importlib.util.find_spec(cls.module) is not None
+
+    def transcribe(self, audio):
+        raise NotImplementedError
+
+
+class GoogleBackend(Backend):
+    name = "google"
+    default_confidence = 0.9
+
+    def __init__(self, recognizer=None, language="en-in"):
+        super().__init__(recognizer)
+        self.language = language
+
+    def transcribe(self, audio):
+        result = self.recognizer.recognize_google(audio, language=self.language, show_all=True)
+        if not result or not result.get("alternative"):
+            raise sr.UnknownValueError()
+        best = result["alternative"][0]
+        return best["transcript"], best.get("confidence", self.default_confidence)
+
+
+class SphinxBackend(Backend):
+    name = "sphinx"
+    local = True
+    module = "pocketsphinx"
+    # Fast but often wrong. It reports no score, so it can never reach the
+    # online threshold and only runs offline, where any transcript counts.
+    default_confidence = max_confidence = 0.5
+
+    def transcribe(self, audio):
+        return self.recognizer.recognize_sphinx(audio), self.default_confidence
+
+
+class WhisperBackend(Backend):
+    name = "whisper"
+    local = True
+    module = "whisper"
+    default_confidence = 0.85
+
+    def __init__(self, recognizer=None, model="base"):
+        super().__init__(recognizer)
+        self.model_name = model
+        self.model = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        """
+        Loads the model on first use, so building the backend never holds up
+        startup. recognize_whisper() would load it on every call, which costs
+        far more than transcribing a short command, so it is kept.
+        """
+        with self.lock:
+            if self.model is None:
+                import torch
+                import whisper
+                self.fp16 = torch.cuda.is_available()
+                self.model = whisper.load_model(self.model_name)
+        return self.model
+
+    def transcribe(self, audio):
+        import numpy
+        model = self.load()
+        samples = numpy.frombuffer(audio.get_raw_data(convert_rate=16000, convert_width=2), dtype=numpy.int16)
+        result = model.transcribe(samples.astype(numpy.float32) / 32768.0, language="english", fp16=self.fp16)
+        text = result["text"].strip()
+        if not text:
+            raise sr.UnknownValueError()
+        segments = result.get("segments") or []
+        if not segments:
+            return text, self.default_confidence
+        avg_logprob = sum(segment["avg_logprob"] for segment in segments) / len(segments)
+        return text, math.exp(avg_logprob)
+
+
+BACKENDS = {backend.name: backend for backend in (GoogleBackend, SphinxBackend, WhisperBackend)}
+
+
+def make_backends(names=None):
+    """
+    Builds the configured backends that are installed here. names defaults
+    to DEX_STT_BACKENDS, a comma-separated list such as "google,whisper".
+    """
+    names = names or os.environ.get("DEX_STT_BACKENDS", "google,whisper,sphinx").split(",")
+    backends = []
+    for name in names:
+        backend = BACKENDS.get(name.strip().lower())
+        if backend is not None and backend.installed():
+            backends.append(backend())
+    return backends
+
+
+# --- Network Check ---
+_network = {"checked_at": 0.0, "online": True}
+
+
+def network_available(host="8.8.8.8", port=53, timeout=0.5, max_age=30):
+    """Cheap reachability check, cached for max_age seconds."""
+    now = time.monotonic()
+    if now - _network["checked_at"] > max_age:
+        try:
+            socket.create_connection((host, port), timeout=timeout).close()
+            _network["online"] = True
+        except OSError:
+            _network["online"] = False
+        _network["checked_at"] = now
+    return _network["online"]
+
+
+# --- First-result-wins Race ---
+class RecognizerRace:
+    """
+    Runs every backend on the same audio at once and returns the first
+    transcript whose confidence reaches min_confidence. Slower backends are
+    cancelled if they have not started, and their results are dropped if
+    they have. If none is confident enough the speech counts as not
+    understood, so the user is asked again rather than acting on a guess.
+    Online, backends that can never reach min_confidence are not run.
+    Offline, only local backends run and any transcript counts.
+    """
+
+    def __init__(self, backends=None, min_confidence=0.6, is_online=network_available):
+        self.backends = backends if backends is not None else make_backends()
+        self.min_confidence = min_confidence
+        self.is_online = is_online
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(self.backends)), thread_name_prefix="dex-stt")
+
+    def recognize(self, audio):
+        """Returns the winning Transcript. Raises sr.UnknownValueError or sr.RequestError like a single engine."""
+        online = self.is_online()
+        threshold = self.min_confidence if online else 0.0
+        backends = [backend for backend in self.backends
+                    if (online or backend.local) and backend.max_confidence >= threshold]
+        if not backends:
+            raise sr.RequestError("No speech recognizer is available offline." if not online else
+                                  "No speech recognizer can reach the confidence threshold.")
+
+        futures = {self.executor.submit(backend.transcribe, audio): backend for backend in backends}
+        pending = set(futures)
+        errors = []
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    backend = futures[future]
+                    try:
+                        text, confidence = future.result()
+                    except sr.UnknownValueError:
+                        continue
+                    except Exception as e:
+                        errors.append(f"{backend.name}: {e}")
+                        continue
+                    if confidence >= threshold:
+                        return Transcript(text, confidence, backend.name)
+        finally:
+            for future in pending:
+                future.cancel()
+        if errors and len(errors) == len(backends):
+            raise sr.RequestError("; ".join(errors))
+        raise sr.UnknownValueError()
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,50 @@
+import asyncio
+import os
+
+# --- Web Data Sources ---
+# Shared by app.py and main.py. Each fetcher returns None when its API key is missing
+# and raises ServiceError when the API reports a failure such as a rate limit.
+WEATHER_URL = "http://api.openweathermap.org/data/2.5/weather"
+NEWS_URL = "https://newsapi.org/v2/top-headlines"
+
+
+class ServiceError(Exception):
+    pass
+
+
+async def fetch_weather(http, city):
+    """Returns OpenWeatherMap's current weather JSON for city."""
+    api_key = os.environ.get("OPENWEATHER_API_KEY")
+    if not api_key:
+        return None
+    data = await http.get_json(WEATHER_URL, params={"appid": api_key, "q": city, "units": "metric"})
+    # "404" (unknown city) is a valid answer; anything else but 200 is a failure.
+    if str(data.get("cod")) not in ("200", "404"):
+        raise ServiceError(f"OpenWeatherMap error {data.get('cod')}: {data.get('message')}")
+    return data
+
+
+async def fetch_headlines(http, country="in"):
+    """Returns the titles of NewsAPI's top headlines for country."""
+    api_key = os.environ.get("NEWSAPI_KEY")
+    if not api_key:
+        return None
+    data = await http.get_json(NEWS_URL, params={"country": country, "apiKey": api_key})
+    if data.get("status") == "error":
+        raise ServiceError(f"NewsAPI error {data.get('code')}: {data.get('message')}")
+    return [article["title"] for article in data.get("articles", [])]
+
+
+async def fetch_wikipedia(query, sentences=2):
+    """Returns a short Wikipedia summary for query. wikipedia.summary blocks, so it runs in a thread."""
+    def lookup():
+        import wikipedia  # slow to import, and only this lookup needs it
+        return wikipedia.summary(query, sentences=sentences)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, lookup)
+
+
+async def download_image(http, url, path):
+    """Saves the image at url to path."""
+    await http.download(url, path)
@@ -1,100 +1,211 @@
+"""
+Speech recognition benchmark.
+
+Runs a directory of labelled WAV clips through every configured
+speech_recognition backend that can run locally and reports, per backend,
+wall-clock latency percentiles, real-time factor, peak memory and word
+error rate. No microphone or network is needed.
+
+Each clip.wav is labelled by a clip.txt next to it holding the reference
+transcript; unlabelled clips are timed but left out of the WER.
+
+    python spech.py clips/ --backends sphinx,whisper --runs 3 --json results.json
+"""
+import argparse
+import json
+import multiprocessing
 import os
+import re
+import sys
+import time
+import tracemalloc
 
 import speech_recognition as sr
 
-# obtain audio from the microphone
-r = sr.Recognizer()
-with sr.Microphone() as source:
-    print("Say something!")
-    audio = r.listen(source)
+from recognizers import BACKENDS
 
-# recognize speech using Sphinx
 try:
-    print("Sphinx thinks you said " + r.recognize_sphinx(audio))
-except sr.UnknownValueError:
-    print("Sphinx could not understand audio")
-except sr.RequestError as e:
-    print("Sphinx error; {0}".format(e))
+    import resource
+except ImportError:  # Windows
+    resource = None
 
-# recognize speech using Google Speech Recognition
-try:
-    # for testing purposes, we're just using the default API key
-    # to use another API key, use `r.recognize_google(audio, key="GOOGLE_SPEECH_RECOGNITION_API_KEY")`
-    # instead of `r.recognize_google(audio)`
-    print("Google Speech Recognition thinks you said " + r.recognize_google(audio))
-except sr.UnknownValueError:
-    print("Google Speech Recognition could not understand audio")
-except sr.RequestError as e:
-    print("Could not request results from Google Speech Recognition service; {0}".format(e))
-
-# recognize speech using Google Cloud Speech
-# Before run, create local authentication credentials (``gcloud auth application-default login``)
-try:
-    print("Google Cloud Speech thinks you said " + r.recognize_google_cloud(audio))
-except sr.UnknownValueError:
-    print("Google Cloud Speech could not understand audio")
-except sr.RequestError as e:
-    print("Could not request results from Google Cloud Speech service; {0}".format(e))
-
-# recognize speech using Wit.ai
-WIT_AI_KEY = "INSERT WIT.AI API KEY HERE"  # Wit.ai keys are 32-character uppercase alphanumeric strings
-try:
-    print("Wit.ai thinks you said " + r.recognize_wit(audio, key=WIT_AI_KEY))
-except sr.UnknownValueError:
-    print("Wit.ai could not understand audio")
-except sr.RequestError as e:
-    print("Could not request results from Wit.ai service; {0}".format(e))
-
-# recognize speech using Microsoft Bing Voice Recognition
-BING_KEY = "INSERT BING API KEY HERE"  # Microsoft Bing Voice Recognition API keys 32-character lowercase hexadecimal strings
-try:
-    print("Microsoft Bing Voice Recognition thinks you said " + r.recognize_bing(audio, key=BING_KEY))
-except sr.UnknownValueError:
-    print("Microsoft Bing Voice Recognition could not understand audio")
-except sr.RequestError as e:
-    print("Could not request results from Microsoft Bing Voice Recognition service; {0}".format(e))
-
-# recognize speech using Microsoft Azure Speech
-AZURE_SPEECH_KEY = "INSERT AZURE SPEECH API KEY HERE"  # Microsoft Speech API keys 32-character lowercase hexadecimal strings
-try:
-    print("Microsoft Azure Speech thinks you said " + r.recognize_azure(audio, key=AZURE_SPEECH_KEY))
-except sr.UnknownValueError:
-    print("Microsoft Azure Speech could not understand audio")
-except sr.RequestError as e:
-    print("Could not request results from Microsoft Azure Speech service; {0}".format(e))
-
-# recognize speech using Houndify
-HOUNDIFY_CLIENT_ID = "INSERT HOUNDIFY CLIENT ID HERE"  # Houndify client IDs are Base64-encoded strings
-HOUNDIFY_CLIENT_KEY = "INSERT HOUNDIFY CLIENT KEY HERE"  # Houndify client keys are Base64-encoded strings
-try:
-    print("Houndify thinks you said " + r.recognize_houndify(audio, client_id=HOUNDIFY_CLIENT_ID, client_key=HOUNDIFY_CLIENT_KEY))
-except sr.UnknownValueError:
-    print("Houndify could not understand audio")
-except sr.RequestError as e:
-    print("Could not request results from Houndify service; {0}".format(e))
-
-# recognize speech using IBM Speech to Text
-IBM_USERNAME = "INSERT IBM SPEECH TO TEXT USERNAME HERE"  # IBM Speech to Text usernames are strings of the form XXXXXXXX-XXXX-XXXX-XXXX-XXXXXXXXXXXX
-IBM_PASSWORD = "INSERT IBM SPEECH TO TEXT PASSWORD HERE"  # IBM Speech to Text passwords are mixed-case alphanumeric strings
-try:
-    print("IBM Speech to Text thinks you said " + r.recognize_ibm(audio, username=IBM_USERNAME, password=IBM_PASSWORD))
-except sr.UnknownValueError:
-    print("IBM Speech to Text could not understand audio")
-except sr.RequestError as e:
-    print("Could not request results from IBM Speech to Text service; {0}".format(e))
 
-# recognize speech using whisper
-try:
-    print("Whisper thinks you said " + r.recognize_whisper(audio, language="english"))
-except sr.UnknownValueError:
-    print("Whisper could not understand audio")
-except sr.RequestError as e:
-    print(f"Could not request results from Whisper; {e}")
-
-# recognize speech using Whisper API
-OPENAI_API_KEY = "INSERT OPENAI API KEY HERE"
-os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
-try:
-    print(f"OpenAI Whisper API thinks you said {r.recognize_openai(audio)}")
-except sr.RequestError as e:
-    print(f"Could not request results from OpenAI Whisper API; {e}")
\ No newline at end of file
+# --- Metrics ---
+def percentile(values, q):
+    """Linear-interpolated percentile of values, q in [0, 100]."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def words(text):
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance (substitutions + deletions + insertions)."""
+    ref, hyp = words(reference), words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1], len(ref)
+
+
+# --- Clips ---
+def load_clips(directory):
+    clips = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(".wav"):
+            continue
+        path = os.path.join(directory, name)
+        label_path = os.path.splitext(path)[0] + ".txt"
+        label = None
+        if os.path.exists(label_path):
+            with open(label_path, "r", encoding="utf-8") as f:
+                label = f.read().strip()
+        clips.append({"path": path, "label": label})
+    return clips
+
+
+def read_audio(path):
+    recognizer = sr.Recognizer()
+    with sr.AudioFile(path) as source:
+        audio = recognizer.record(source)
+    return audio, len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+
+
+# --- Benchmark ---
+def transcribe(backend, audio):
+    """Returns (text, error) for one clip; speech the backend did not understand is an empty text, not an error."""
+    try:
+        return backend.transcribe(audio)[0], None
+    except sr.UnknownValueError:
+        return "", None
+    except Exception as e:
+        return "", str(e)
+
+
+def run_backend(name, clips, runs):
+    """
+    Transcribes every clip `runs` times with one backend. Runs in its own
+    process so peak memory is per backend. Loading the model and the first
+    transcription are left out of the timings, and nothing traces memory
+    while they run.
+    """
+    backend = BACKENDS[name]()
+    audios = [read_audio(clip["path"]) for clip in clips]
+    transcribe(backend, audios[0][0])  # warm-up
+
+    results = []
+    for clip, (audio, duration) in zip(clips, audios):
+        for run in range(runs):
+            start = time.perf_counter()
+            text, error = transcribe(backend, audio)
+            latency = time.perf_counter() - start
+            results.append({
+                "clip": os.path.basename(clip["path"]), "run": run, "duration": duration,
+                "latency": latency, "text": text, "label": clip["label"], "error": error,
+            })
+
+    peak_rss = python_peak = None
+    if resource is not None:
+        # ru_maxrss is KiB on Linux and bytes on macOS.
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    else:
+        # tracemalloc slows every allocation, so it gets a pass of its own.
+        tracemalloc.start()
+        for audio, _ in audios:
+            transcribe(backend, audio)
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {"results": results, "peak_rss_bytes": peak_rss, "python_peak_bytes": python_peak}
+
+
+def summarize(name, measured):
+    results = measured["results"]
+    latencies = [r["latency"] for r in results]
+    errors = total_words = 0
+    for r in results:
+        if r["label"] is not None:
+            e, n = word_errors(r["label"], r["text"])
+            errors += e
+            total_words += n
+    audio_seconds = sum(r["duration"] for r in results)
+    return {
+        "backend": name,
+        "clips": len({r["clip"] for r in results}),
+        "transcriptions": len(results),
+        "failures": sum(r["error"] is not None for r in results),
+        "latency_p50": percentile(latencies, 50),
+        "latency_p90": percentile(latencies, 90),
+        "latency_p99": percentile(latencies, 99),
+        "real_time_factor": sum(latencies) / audio_seconds if audio_seconds else None,
+        "wer": errors / total_words if total_words else None,
+        "peak_rss_bytes": measured["peak_rss_bytes"],
+        "python_peak_bytes": measured["python_peak_bytes"],
+        "results": results,
+    }
+
+
+def ms(value):
+    return f"{value * 1000:7.0f}ms" if value is not None else "      n/a"
+
+
+def print_table(summaries):
+    print(f"{'backend':<10}{'p50':>9}{'p90':>9}{'p99':>9}{'RTF':>8}{'WER':>8}{'peak MB':>10}{'failed':>8}")
+    for s in summaries:
+        rtf = f"{s['real_time_factor']:8.2f}" if s["real_time_factor"] is not None else "     n/a"
+        wer = f"{s['wer'] * 100:7.1f}%" if s["wer"] is not None else "     n/a"
+        peak = s["peak_rss_bytes"] or s["python_peak_bytes"]
+        print(f"{s['backend']:<10}{ms(s['latency_p50'])}{ms(s['latency_p90'])}{ms(s['latency_p99'])}{rtf}{wer}{peak / 2**20:10.1f}{s['failures']:8d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local speech recognition backends on labelled WAV clips.")
+    parser.add_argument("clips", help="directory of .wav clips with optional .txt reference transcripts")
+    parser.add_argument("--backends", default=",".join(name for name, b in BACKENDS.items() if b.local),
+                        help="comma-separated backends (default: all local ones)")
+    parser.add_argument("--runs", type=int, default=1, help="transcriptions per clip")
+    parser.add_argument("--include-remote", action="store_true", help="also allow network backends such as google")
+    parser.add_argument("--json", help="write the full results to this file")
+    args = parser.parse_args()
+
+    clips = load_clips(args.clips)
+    if not clips:
+        sys.exit(f"No .wav clips found in {args.clips}")
+
+    summaries = []
+    for name in [n.strip().lower() for n in args.backends.split(",") if n.strip()]:
+        backend = BACKENDS.get(name)
+        if backend is None:
+            print(f"🔴 Unknown backend '{name}', skipping.")
+            continue
+        if not backend.local and not args.include_remote:
+            print(f"Skipping {name}: it needs the network (use --include-remote).")
+            continue
+        if not backend.installed():
+            print(f"Skipping {name}: the '{backend.module}' package is not installed.")
+            continue
+        print(f"Running {name} on {len(clips)} clips x {args.runs} runs...")
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            measured = pool.apply(run_backend, (name, clips, args.runs))
+        summaries.append(summarize(name, measured))
+
+    if not summaries:
+        sys.exit("No backend could run.")
+    print_table(summaries)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"clips": args.clips, "runs": args.runs, "backends": summaries}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+
+from gemini_client import LatencyHistogram
+
+# --- Tracing ---
+# Off unless DEX_TRACE=1. Spans are timed blocks of work; each one is written
+# as a JSON line to a rotating trace file and counted in a per-name histogram
+# that DEX_METRICS_PORT serves in Prometheus text format. While tracing is off
+# span() hands back one shared do-nothing object, so instrumented code costs
+# a function call and an attribute check.
+ENABLED = os.environ.get("DEX_TRACE", "0") == "1"
+TRACE_FILE = os.environ.get("DEX_TRACE_FILE", os.path.join(os.path.expanduser("~"), ".dex", "trace.jsonl"))
+TRACE_MAX_BYTES = int(float(os.environ.get("DEX_TRACE_MAX_MB", "5")) * 1024 * 1024)
+TRACE_BACKUPS = int(os.environ.get("DEX_TRACE_BACKUPS", "3"))
+METRICS_PORT = int(os.environ.get("DEX_METRICS_PORT", "0"))  # 0: no endpoint
+# Show the last turn's breakdown in the status label (app.py).
+SHOW_IN_STATUS = os.environ.get("DEX_TRACE_STATUS", "0") == "1"
+# Upper bounds of the span histogram buckets, in seconds.
+SPAN_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf")]
+
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer.record(self.name, time.perf_counter() - self.start, **self.attrs)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """
+    Collects spans, groups them by turn (one user command), writes them to
+    the trace file and keeps Prometheus-style histograms and counters.
+    """
+
+    def __init__(self, enabled=ENABLED, path=TRACE_FILE, max_bytes=TRACE_MAX_BYTES, backups=TRACE_BACKUPS):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.histograms = {}  # span name -> LatencyHistogram
+        self.errors = {}  # span name -> count
+        self.turns = 0
+        self.turn_ids = itertools.count(1)
+        self.turn = None
+        self.turn_id = None
+        self.turn_start = None
+        self.server = None
+        self.log = None
+        if enabled:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            self.log = logging.getLogger(f"dex.trace.{id(self)}")
+            self.log.propagate = False
+            self.log.setLevel(logging.INFO)
+            self.log.addHandler(handler)
+
+    def span(self, name, **attrs):
+        """Times a with-block as the span name."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs)
+
+    def record(self, name, seconds, **attrs):
+        """Records a duration measured elsewhere as a finished span."""
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram(SPAN_BUCKETS)
+            histogram.observe(seconds)
+            if "error" in attrs:
+                self.errors[name] = self.errors.get(name, 0) + 1
+            if self.turn is not None:
+                self.turn[name] = self.turn.get(name, 0.0) + seconds
+            turn_id = self.turn_id
+        self.log.info(json.dumps(dict(attrs, name=name, turn=turn_id, ts=round(time.time(), 3), seconds=round(seconds, 6))))
+
+    def start_turn(self):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.turn = {}
+            self.turn_id = next(self.turn_ids)
+            self.turn_start = time.perf_counter()
+
+    def end_turn(self):
+        """Closes the current turn. Returns its total time and span name -> seconds, or None."""
+        if not self.enabled or self.turn is None:
+            return None
+        total = time.perf_counter() - self.turn_start
+        with self.lock:
+            breakdown, self.turn = self.turn, None
+            self.turns += 1
+        self.record("turn", total)
+        return total, breakdown
+
+    # --- Prometheus Export ---
+    def metrics_text(self):
+        """The histograms and counters in the Prometheus text exposition format."""
+        lines = [
+            "# HELP dex_span_seconds Time spent in each traced stage.",
+            "# TYPE dex_span_seconds histogram",
+        ]
+        with self.lock:
+            for name, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'dex_span_seconds_bucket{{span="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'dex_span_seconds_sum{{span="{name}"}} {histogram.total}')
+                lines.append(f'dex_span_seconds_count{{span="{name}"}} {histogram.count}')
+            lines += [
+                "# HELP dex_span_errors_total Traced stages that raised.",
+                "# TYPE dex_span_errors_total counter",
+            ]
+            lines += [f'dex_span_errors_total{{span="{name}"}} {count}' for name, count in sorted(self.errors.items())]
+            lines += [
+                "# HELP dex_turns_total Commands handled.",
+                "# TYPE dex_turns_total counter",
+                f"dex_turns_total {self.turns}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def serve_metrics(self, port=METRICS_PORT):
+        """Serves metrics_text() at http://127.0.0.1:port/metrics on a daemon thread."""
+        if not self.enabled or not port or self.server is not None:
+            return
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = tracer.metrics_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self.server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+        except OSError as e:
+            print(f"🔴 Metrics endpoint error: {e}")
+            return
+        threading.Thread(target=self.server.serve_forever, name="dex-metrics", daemon=True).start()
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.log is not None:
+            for handler in self.log.handlers:
+                handler.close()
+
+
+# Spans shown in a turn's breakdown, with their labels.
+TURN_STAGES = [
+    ("listen", "listen"),
+    ("recognize", "recognize"),
+    ("fetch", "web"),
+    ("gemini", "AI"),
+    ("tts.synthesize", "speech"),
+    ("tts.playback", "playback"),
+]
+
+
+def format_breakdown(total, breakdown, stages=TURN_STAGES):
+    """One status line: the turn's total, then the time of each stage that ran."""
+    parts = [f"{label} {breakdown[name]:.1f}s" for name, label in stages if breakdown.get(name)]
+    return f"Last turn {total:.1f}s: " + " · ".join(parts)
+
+
+tracer = Tracer()
+span = tracer.span
+record = tracer.record
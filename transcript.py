@@ -0,0 +1,258 @@
+import json
+import os
+from collections import deque
+
+from PyQt5.QtCore import QEvent, QRect, QSize, Qt, QTimer
+from PyQt5.QtGui import QColor, QPainter, QStandardItem, QStandardItemModel, QStaticText, QTextOption
+from PyQt5.QtWidgets import QAbstractItemView, QListView, QStyledItemDelegate
+
+DEFAULT_SPILL_FILE = os.path.join(os.path.expanduser("~"), ".dex", "transcript.jsonl")
+MAX_MESSAGES = int(os.environ.get("DEX_TRANSCRIPT_MAX", "200"))
+# Earlier messages that can be read back from disk; their offsets are kept in memory.
+MAX_HISTORY = int(os.environ.get("DEX_TRANSCRIPT_HISTORY", "10000"))
+PAGE_SIZE = 50  # messages read back from disk per scroll to the top, and trimmed at a time
+BATCH_MS = 50
+
+SenderRole = Qt.UserRole + 1
+
+
+class TranscriptModel(QStandardItemModel):
+    """
+    The chat transcript as a list model. Every message is appended to a
+    JSONL spill file; only the newest max_messages stay in memory, and
+    older ones are read back a page at a time with load_older(), as far
+    back as the last max_history messages.
+
+    Each row carries its size hint, filled in by measure(sender, text), so
+    the list view lays rows out without calling back into Python.
+    """
+
+    def __init__(self, path=None, max_messages=MAX_MESSAGES, max_history=MAX_HISTORY, parent=None):
+        super().__init__(parent)
+        self.path = path or os.environ.get("DEX_TRANSCRIPT_FILE", DEFAULT_SPILL_FILE)
+        self.max_messages = max_messages
+        self.measure = None  # set by the view
+        self.first = 0  # position in the whole transcript of row 0
+        # Byte offsets in the spill file of the newest max_history messages;
+        # offsets[0] belongs to message number offsets_start.
+        self.offsets = deque(maxlen=max(max_history, max_messages + PAGE_SIZE))
+        self.offsets_start = 0
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # The transcript belongs to one session.
+        self.spill = open(self.path, "w+b")
+
+    def make_item(self, sender, text):
+        item = QStandardItem(text)
+        item.setData(sender, SenderRole)
+        item.setEditable(False)
+        if self.measure is not None:
+            item.setSizeHint(self.measure(sender, text))
+        return item
+
+    def extend(self, messages):
+        """Appends a batch of (sender, text) messages with one model update."""
+        if not messages:
+            return
+        self.spill.seek(0, os.SEEK_END)
+        for sender, text in messages:
+            if len(self.offsets) == self.offsets.maxlen:
+                self.offsets_start += 1
+            self.offsets.append(self.spill.tell())
+            self.spill.write(json.dumps([sender, text]).encode("utf-8") + b"\n")
+        self.spill.flush()
+        self.invisibleRootItem().appendRows([self.make_item(sender, text) for sender, text in messages])
+
+    def trim(self, slack=PAGE_SIZE):
+        """
+        Drops the oldest in-memory messages beyond max_messages; they stay in
+        the spill file. Nothing happens until there are more than slack
+        extra, so rows are removed a page at a time rather than per message.
+        """
+        extra = self.rowCount() - self.max_messages
+        if extra <= slack:
+            return
+        self.removeRows(0, extra)
+        self.first += extra
+
+    def has_older(self):
+        return self.first > self.offsets_start
+
+    def load_older(self, count=PAGE_SIZE):
+        """Reads up to count earlier messages back from the spill file. Returns how many were loaded."""
+        start = max(self.offsets_start, self.first - count)
+        if start >= self.first:
+            return 0
+        self.spill.seek(self.offsets[start - self.offsets_start])
+        older = [json.loads(self.spill.readline()) for _ in range(self.first - start)]
+        self.invisibleRootItem().insertRows(0, [self.make_item(sender, text) for sender, text in older])
+        self.first = start
+        return len(older)
+
+    def remeasure(self):
+        """Recomputes every row's size hint, e.g. after the view's width or font changed."""
+        for row in range(self.rowCount()):
+            item = self.item(row)
+            item.setSizeHint(self.measure(item.data(SenderRole), item.text()))
+
+    def close(self):
+        self.spill.close()
+
+
+class MessageDelegate(QStyledItemDelegate):
+    """Paints each message as a chat bubble: the user's on the right, Dex's on the left."""
+
+    PADDING_X, PADDING_Y, SPACING, RADIUS = 15, 10, 12, 18
+    MAX_WIDTH = 0.75  # of the view width
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Laying out wrapped text is the expensive part of both sizing and
+        # painting a bubble, so both are remembered per width.
+        self.text_sizes = {}
+        self.layouts = {}  # QStaticText, laid out on first paint
+
+    def clear(self):
+        """Forgets measured text, e.g. after a font change."""
+        self.text_sizes.clear()
+        self.layouts.clear()
+
+    def available_width(self, width):
+        return max(int(width * self.MAX_WIDTH) - 2 * self.PADDING_X, 1)
+
+    def text_layout(self, text, width):
+        available = self.available_width(width)
+        layout = self.layouts.get((text, available))
+        if layout is None:
+            if len(self.layouts) > 4 * MAX_MESSAGES:
+                self.layouts.clear()
+            layout = QStaticText(text)
+            layout.setTextFormat(Qt.PlainText)
+            option = QTextOption()
+            option.setWrapMode(QTextOption.WordWrap)
+            layout.setTextOption(option)
+            layout.setTextWidth(available)
+            self.layouts[(text, available)] = layout
+        return layout
+
+    def text_size(self, font_metrics, text, width):
+        available = self.available_width(width)
+        size = self.text_sizes.get((text, available))
+        if size is None:
+            if len(self.text_sizes) > 4 * MAX_MESSAGES:
+                self.text_sizes.clear()
+            size = font_metrics.boundingRect(QRect(0, 0, available, 100000), Qt.TextWordWrap, text).size()
+            self.text_sizes[(text, available)] = size
+        return size
+
+    def size_for(self, font_metrics, text, width):
+        """The size hint of a row showing text in a view width wide."""
+        return QSize(width, self.text_size(font_metrics, text, width).height() + 2 * self.PADDING_Y + self.SPACING)
+
+    def bubble_rect(self, option, index):
+        size = self.text_size(option.fontMetrics, index.data(), option.rect.width())
+        width = size.width() + 2 * self.PADDING_X
+        height = size.height() + 2 * self.PADDING_Y
+        x = option.rect.right() - width if index.data(SenderRole).lower() == "you" else option.rect.left()
+        return QRect(x, option.rect.top(), width, height)
+
+    def paint(self, painter, option, index):
+        is_user = index.data(SenderRole).lower() == "you"
+        bubble = self.bubble_rect(option, index)
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor("#374151" if is_user else "#00BFFF"))
+        painter.drawRoundedRect(bubble, self.RADIUS, self.RADIUS)
+        painter.setPen(QColor("white" if is_user else "black"))
+        painter.setFont(option.font)
+        painter.drawStaticText(bubble.left() + self.PADDING_X, bubble.top() + self.PADDING_Y,
+                               self.text_layout(index.data(), option.rect.width()))
+        painter.restore()
+
+
+class TranscriptView(QListView):
+    """
+    Shows a TranscriptModel; rows are laid out in batches and only the
+    visible ones are painted. Messages added within BATCH_MS of each other
+    reach the model as one update. While the view is scrolled to the
+    bottom it follows new messages and keeps the model trimmed; scrolling
+    to the top loads the previous page from disk.
+    """
+
+    def __init__(self, model=None, parent=None):
+        super().__init__(parent)
+        self.transcript = model or TranscriptModel(parent=self)
+        self.delegate = MessageDelegate(self)
+        self.transcript.measure = self.measure
+        self.setModel(self.transcript)
+        self.setItemDelegate(self.delegate)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        # Rows are laid out a batch at a time from the event loop instead of
+        # all at once on every insert. Bubble heights depend on the width and
+        # font, so a change to either remeasures the rows.
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(PAGE_SIZE)
+        self.setWordWrap(True)
+        self.following = True  # scrolled to the bottom
+        self.measured_width = self.viewport().width()
+        self.pending = []
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(BATCH_MS)
+        self.flush_timer.timeout.connect(self.flush)
+        self.verticalScrollBar().valueChanged.connect(self.on_scroll)
+        # Following happens once the new rows are laid out and the range grows.
+        self.verticalScrollBar().rangeChanged.connect(self.on_range_changed)
+
+    def measure(self, sender, text):
+        return self.delegate.size_for(self.fontMetrics(), text, self.viewport().width())
+
+    def add_message(self, sender, message):
+        self.pending.append((sender, message))
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def at_bottom(self):
+        bar = self.verticalScrollBar()
+        return bar.value() >= bar.maximum() - 4
+
+    def flush(self):
+        messages, self.pending = self.pending, []
+        self.transcript.extend(messages)
+        if self.following:
+            self.transcript.trim()
+
+    def on_range_changed(self, minimum, maximum):
+        if self.following:
+            self.verticalScrollBar().setValue(maximum)
+
+    def on_scroll(self, value):
+        bar = self.verticalScrollBar()
+        self.following = self.at_bottom()
+        if value == bar.minimum() and bar.maximum() > 0 and self.transcript.has_older():
+            old_range = bar.maximum()
+            if self.transcript.load_older():
+                # Keep the message the user was looking at in place, which
+                # needs the whole new layout now rather than in batches.
+                self.setLayoutMode(QListView.SinglePass)
+                self.doItemsLayout()
+                self.setLayoutMode(QListView.Batched)
+                bar.setValue(bar.maximum() - old_range)
+
+    def remeasure(self):
+        self.measured_width = self.viewport().width()
+        self.transcript.remeasure()
+        self.scheduleDelayedItemsLayout()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.viewport().width() != self.measured_width:
+            self.remeasure()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.FontChange:
+            self.delegate.clear()
+            self.remeasure()
@@ -0,0 +1,406 @@
+import asyncio
+import importlib.util
+import os
+import queue
+import shutil
+import time
+
+import audio_out
+import tracing
+
+# --- Playback ---
+# "memory" (the default) decodes speech in memory and plays it on the output
+# thread in audio_out.py. "pipe" streams the MP3 to an installed stdin
+# player instead, which starts long utterances sooner but cannot join
+# sentences without a gap; it is also used when miniaudio is missing.
+AUDIO_OUTPUT = os.environ.get("DEX_AUDIO_OUTPUT", "memory")
+# Players that can decode MP3 from stdin, in order of preference.
+STREAM_PLAYERS = [
+    ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", "-i", "pipe:0"],
+    ["mpv", "--no-video", "--really-quiet", "-"],
+    ["mpg123", "-q", "-"],
+]
+
+_output = None
+
+
+def mp3_frame_start(data):
+    """
+    Index of the first MP3 frame header in data: an 0xFF byte followed by
+    one whose top three bits are set (the 11-bit frame sync). -1 if none.
+    """
+    start = data.find(b"\xff")
+    while 0 <= start < len(data) - 1:
+        if data[start + 1] & 0xE0 == 0xE0:
+            return start
+        start = data.find(b"\xff", start + 1)
+    return -1
+
+
+# edge_tts is imported on first use so the front ends start quickly.
+def new_communicate(text, voice):
+    import edge_tts
+    return edge_tts.Communicate(text, voice)
+
+
+def find_stream_player():
+    """Returns the command line of the first installed stdin MP3 player, or None."""
+    for command in STREAM_PLAYERS:
+        if shutil.which(command[0]):
+            return command
+    return None
+
+
+class PipePlayer:
+    """
+    Plays MP3 data as it arrives by feeding it to an external player's stdin.
+    The player process is only started once the first audio bytes exist.
+    """
+
+    def __init__(self, command):
+        self.command = command
+        self.process = None
+
+    async def write(self, chunk):
+        if self.process is None:
+            self.process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        self.process.stdin.write(chunk)
+        await self.process.stdin.drain()
+
+    async def finish(self):
+        if self.process is None:
+            return
+        self.process.stdin.close()
+        await self.process.wait()
+
+    def stop(self):
+        """Cuts playback off at once; finish() then returns without waiting for the audio to end."""
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+
+
+def get_output():
+    """The shared AudioOutput, created on first use."""
+    global _output
+    if _output is None:
+        _output = audio_out.AudioOutput(audio_out.make_sink())
+    return _output
+
+
+def set_output(output):
+    """Replaces the shared AudioOutput, e.g. with one on a NullSink for tests."""
+    global _output
+    _output = output
+
+
+def close_output():
+    global _output
+    if _output is not None:
+        _output.close()
+        _output = None
+
+
+def pipe_player_command():
+    """The stdin player to stream through, or None to play in memory."""
+    if AUDIO_OUTPUT != "pipe" and importlib.util.find_spec("miniaudio") is not None:
+        return None
+    return find_stream_player()
+
+
+async def audio_chunks(communicate):
+    """Yields only the MP3 audio payloads from an edge_tts Communicate stream."""
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio" and chunk["data"]:
+            yield chunk["data"]
+
+
+# --- In-Memory Playback ---
+async def decode_audio(data):
+    """Decodes MP3 bytes to PCM on an executor thread."""
+    with tracing.span("tts.decode"):
+        return await asyncio.get_running_loop().run_in_executor(None, audio_out.decode, data)
+
+
+async def submit_pcm(output, pcm, on_start=None):
+    """Hands pcm to the output thread without waiting for it to play. Returns its playback Future."""
+    generation = output.generation
+    try:
+        return output.submit(pcm, on_start, generation, block=False)
+    except queue.Full:
+        # Far ahead of playback: wait for room off the event loop.
+        return await asyncio.get_running_loop().run_in_executor(None, output.submit, pcm, on_start, generation)
+
+
+async def play_pcm(pcm, output=None, on_start=None):
+    """Plays decoded PCM and returns once it has played. Cancelling it silences the output at once."""
+    output = output or get_output()
+    try:
+        done = await submit_pcm(output, pcm, on_start)
+        with tracing.span("tts.playback"):
+            await asyncio.wrap_future(done)
+    except asyncio.CancelledError:
+        output.stop()  # barge-in
+        raise
+
+
+async def speak_streaming(text, voice, player=None, communicate=None, cache=None, output=None):
+    """
+    Speaks text while it is still being synthesized: audio chunks go to the
+    player as soon as the first MP3 frame has arrived. Phrases found in the
+    audio cache are played without a TTS round trip. Without a pipe player
+    the chunks are decoded in memory by speak_decoded().
+    Returns the time to first audio in seconds, or None if nothing was played.
+    """
+    start = time.perf_counter()
+    if player is None:
+        command = pipe_player_command()
+        if command is None:
+            return await speak_decoded(text, voice, communicate=communicate, cache=cache, output=output)
+        player = PipePlayer(command)
+    communicate = communicate or new_communicate(text, voice)
+
+    received = None
+    if cache is not None and cache.cacheable(text):
+        data = cache.get(voice, text)
+        if data is not None:
+            first_audio = time.perf_counter() - start
+            await play_audio(data, player)
+            return first_audio
+        received = []
+
+    first_audio = None
+    pending = b""
+    try:
+        with tracing.span("tts.synthesize", streamed=True):
+            async for data in audio_chunks(communicate):
+                if received is not None:
+                    received.append(data)
+                if first_audio is None:
+                    # Hold back leading bytes until an MP3 frame header is present
+                    # and drop what comes before it, so the decoder never starts
+                    # on a partial frame.
+                    pending += data
+                    frame_start = mp3_frame_start(pending)
+                    if frame_start < 0:
+                        continue
+                    data, pending = pending[frame_start:], b""
+                    first_audio = time.perf_counter() - start
+                    tracing.record("tts.first_audio", first_audio)
+                await player.write(data)
+    except asyncio.CancelledError:
+        player.stop()  # barge-in
+        raise
+    finally:
+        # Only the tail is left to play once synthesis has finished.
+        with tracing.span("tts.playback"):
+            await player.finish()
+    if received:
+        cache.put(voice, text, b"".join(received))
+    return first_audio
+
+
+async def speak_decoded(text, voice, communicate=None, cache=None, output=None):
+    """
+    Speaks text while it is still being synthesized, in memory: MP3 chunks
+    are decoded as they arrive and each block of PCM is queued on the
+    output thread, so playback starts with the first block. Phrases found
+    in the audio cache are played without a TTS round trip, and cacheable
+    ones are stored once fully synthesized.
+    Returns the time to first audio in seconds, or None if nothing was played.
+    """
+    start = time.perf_counter()
+    received = None
+    if cache is not None and cache.cacheable(text):
+        data = cache.get(voice, text)
+        if data is not None:
+            return await play_mp3(data, start, output)
+        received = []
+    output = output or get_output()
+    generation = output.generation
+    started = []
+    last = None  # playback Future of the latest block
+
+    def on_pcm(pcm):
+        # On the decoder thread; blocks while the output queue is full.
+        nonlocal last
+        on_start = None if last is not None else lambda: started.append(time.perf_counter())
+        last = output.submit(pcm, on_start, generation)
+
+    decoder = audio_out.StreamDecoder(on_pcm)
+    communicate = communicate or new_communicate(text, voice)
+    try:
+        with tracing.span("tts.synthesize", streamed=True):
+            async for data in audio_chunks(communicate):
+                if received is not None:
+                    received.append(data)
+                decoder.feed(data)
+        decoder.finish()
+        await asyncio.get_running_loop().run_in_executor(None, decoder.done.wait)
+        if decoder.error is not None:
+            raise decoder.error
+        if received:
+            cache.put(voice, text, b"".join(received))
+        if last is not None:
+            # Only the tail is left to play once synthesis has finished.
+            with tracing.span("tts.playback"):
+                await asyncio.wrap_future(last)
+    except asyncio.CancelledError:
+        output.stop()  # barge-in
+        raise
+    finally:
+        decoder.cancel()
+    if not started:
+        return None
+    first_audio = started[0] - start
+    tracing.record("tts.first_audio", first_audio)
+    return first_audio
+
+
+async def synthesize(text, voice, communicate=None, cache=None):
+    """Synthesizes the whole of text into memory and returns the MP3 bytes."""
+    use_cache = cache is not None and cache.cacheable(text)
+    if use_cache:
+        data = cache.get(voice, text)
+        if data is not None:
+            return data
+    communicate = communicate or new_communicate(text, voice)
+    with tracing.span("tts.synthesize"):
+        data = b"".join([data async for data in audio_chunks(communicate)])
+    if use_cache:
+        cache.put(voice, text, data)
+    return data
+
+
+async def speak_buffered(text, voice, communicate=None, cache=None, output=None):
+    """
+    Synthesizes the whole utterance into memory, decodes it and plays it on
+    the output thread. Returns the time to first audio in seconds.
+    """
+    start = time.perf_counter()
+    data = await synthesize(text, voice, communicate=communicate, cache=cache)
+    return await play_mp3(data, start, output)
+
+
+async def play_mp3(data, start, output=None):
+    """Decodes MP3 bytes and plays them on the output thread. Returns the time to first audio since start."""
+    pcm = await decode_audio(data)
+    started = []
+    await play_pcm(pcm, output, lambda: started.append(time.perf_counter()))
+    if not started:
+        return None
+    first_audio = started[0] - start
+    tracing.record("tts.first_audio", first_audio)
+    return first_audio
+
+
+async def play_audio(data, player=None, output=None):
+    """Plays MP3 bytes through a stream player, or decoded in memory if there is none."""
+    if player is None:
+        command = pipe_player_command()
+        if command is not None:
+            player = PipePlayer(command)
+    if player is None:
+        await play_pcm(await decode_audio(data), output)
+        return
+    with tracing.span("tts.playback"):
+        try:
+            await player.write(data)
+        except asyncio.CancelledError:
+            player.stop()
+            raise
+        finally:
+            await player.finish()
+
+
+# --- Speech Queue ---
+async def speak_pipelined(sentences, voice, on_sentence=None, cache=None, workers=1, player=None, output=None):
+    """
+    Speaks an async stream of sentences in order. Up to `workers` upcoming
+    sentences are synthesized concurrently while the current one plays.
+    In memory each sentence is decoded and queued on the output thread
+    behind the one playing, and on_sentence is called as it starts to play;
+    through a pipe player they all go to one process, and on_sentence is
+    called as each sentence comes up. Either way there are no gaps.
+    """
+    ready = asyncio.Queue(maxsize=workers)
+    limit = asyncio.Semaphore(workers)
+    loop = asyncio.get_running_loop()
+
+    async def synthesize_limited(sentence):
+        async with limit:
+            return await synthesize(sentence, voice, cache=cache)
+
+    async def produce():
+        try:
+            async for sentence in sentences:
+                await ready.put((sentence, asyncio.ensure_future(synthesize_limited(sentence))))
+        finally:
+            await ready.put(None)
+
+    if player is None:
+        command = pipe_player_command()
+        if command is not None:
+            player = PipePlayer(command)
+    if player is None:
+        output = output or get_output()
+
+    producer = asyncio.ensure_future(produce())
+    queued = None  # playback Future of the last sentence handed to the output
+    try:
+        while True:
+            item = await ready.get()
+            if item is None:
+                break
+            sentence, audio = item
+            if on_sentence and player is not None:
+                on_sentence(sentence)
+            try:
+                data = await audio
+                if player is None:
+                    pcm = await decode_audio(data)
+            except Exception as e:
+                print(f"🔴 Speech Error: {e}")
+                continue
+            if player is not None:
+                with tracing.span("tts.playback"):
+                    await player.write(data)
+            else:
+                on_start = None
+                if on_sentence:
+                    on_start = lambda sentence=sentence: loop.call_soon_threadsafe(on_sentence, sentence)
+                queued = await submit_pcm(output, pcm, on_start)
+        await producer
+        if queued is not None:
+            with tracing.span("tts.playback"):
+                await asyncio.wrap_future(queued)
+    except asyncio.CancelledError:
+        # Barge-in: the producer, pending synthesis and playback all stop below.
+        if player is not None:
+            player.stop()
+        else:
+            output.stop()
+        raise
+    finally:
+        producer.cancel()
+        while not ready.empty():
+            item = ready.get_nowait()
+            if item is not None:
+                item[1].cancel()
+        if player is not None:
+            with tracing.span("tts.playback"):
+                await player.finish()
+
+
+async def speak_batch(texts, voice, on_sentence=None, cache=None, workers=3, player=None, output=None):
+    """Speaks a list of utterances in order, synthesizing up to `workers` of them at once."""
+    async def utterances():
+        for text in texts:
+            if text.strip():
+                yield text
+
+    await speak_pipelined(utterances(), voice, on_sentence, cache, workers, player, output)
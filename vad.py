@@ -0,0 +1,71 @@
+import numpy as np
+
+
+class VoiceActivityDetector:
+    """
+    Cheap frame-level voice activity detection. Short-time energy and
+    zero-crossing rate are computed for a whole block of frames at once with
+    NumPy; a frame is speech when its energy stands well above the tracked
+    noise floor and its zero-crossing rate looks voiced rather than hiss.
+    A short hangover keeps the gaps between syllables inside one segment.
+    """
+
+    def __init__(self, sample_rate, frame_ms=20, energy_ratio=4.0, min_zcr=0.01, max_zcr=0.30,
+                 noise_adapt=0.05, hangover_ms=200):
+        self.frame_length = max(1, sample_rate * frame_ms // 1000)
+        self.frame_seconds = self.frame_length / sample_rate
+        self.energy_ratio = energy_ratio
+        self.min_zcr = min_zcr
+        self.max_zcr = max_zcr
+        self.noise_adapt = noise_adapt
+        self.hangover_frames = int(hangover_ms / frame_ms)
+        self.hangover = 0
+        self.noise_energy = None
+        self.remainder = np.empty(0, dtype=np.float32)
+
+    def frames(self, buffer, sample_width=2):
+        """Returns one speech flag per complete frame in buffer (raw little-endian PCM)."""
+        dtype = {1: np.int8, 2: np.int16, 4: np.int32}[sample_width]
+        samples = np.frombuffer(buffer, dtype=dtype).astype(np.float32)
+        if sample_width == 4:
+            samples /= 65536.0  # scale to the 16-bit range the thresholds assume
+        elif sample_width == 1:
+            samples *= 256.0
+        samples = np.concatenate((self.remainder, samples))
+        count = len(samples) // self.frame_length
+        self.remainder = samples[count * self.frame_length:]
+        if count == 0:
+            return np.zeros(0, dtype=bool)
+
+        frames = samples[:count * self.frame_length].reshape(count, self.frame_length)
+        energy = np.einsum("ij,ij->i", frames, frames) / self.frame_length
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame_length
+
+        if self.noise_energy is None:
+            self.noise_energy = max(float(np.median(energy)), 1.0)
+        loud = energy > self.noise_energy * self.energy_ratio
+        voiced = loud & (zcr >= self.min_zcr) & (zcr <= self.max_zcr)
+
+        quiet = energy[~loud]
+        if len(quiet):
+            # Follow the noise floor using only the frames that are not speech.
+            weight = 1 - (1 - self.noise_adapt) ** len(quiet)
+            self.noise_energy += weight * (float(quiet.mean()) - self.noise_energy)
+            self.noise_energy = max(self.noise_energy, 1.0)
+
+        flags = np.empty(count, dtype=bool)
+        for i, is_voiced in enumerate(voiced):
+            if is_voiced:
+                self.hangover = self.hangover_frames
+                flags[i] = True
+            elif self.hangover:
+                self.hangover -= 1
+                flags[i] = True
+            else:
+                flags[i] = False
+        return flags
+
+    def is_speech(self, buffer, sample_width=2):
+        """True if any frame of buffer is speech."""
+        return bool(self.frames(buffer, sample_width).any())
@@ -0,0 +1,21 @@
+import importlib
+import os
+
+# Loaded on first use by the commands that need them; warm_up() imports them early.
+LAZY_MODULES = ["google.generativeai", "edge_tts", "miniaudio", "wikipedia", "pywhatkit", "pyautogui"]
+
+
+def warm_up(modules=LAZY_MODULES):
+    """
+    Imports the slow optional modules ahead of their first command. Meant
+    to run on a background thread once the front end is up; set
+    DEX_WARMUP=0 to skip it. A module that fails to import is reported and
+    skipped.
+    """
+    if os.environ.get("DEX_WARMUP", "1") == "0":
+        return
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"🔴 Could not preload {name}: {e}")